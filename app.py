@@ -1,29 +1,28 @@
 from flask import Flask, jsonify, send_from_directory
 from flask_cors import CORS
-import mysql.connector
-import subprocess
 import os
-from flask import send_file
-from flask import Flask, jsonify, send_from_directory, request
+from flask import Flask, jsonify, send_from_directory, request, Response, stream_with_context
 import traceback
 
 from upload_scripts import upload_bp
 from save_scripts import save_bp
-from dotenv import load_dotenv
-load_dotenv()
+from import_bundle import bundle_bp
+from schedule_api import schedule_bp
+from room_availability import rooms_bp
+from db import check_health
+from readiness import check_all_tables
+from pipeline import run_pipeline, StageError
+from progress import stream_events
+from singleflight import flights, RunCancelled
+from export_store import (
+    build_exports, resolve as resolve_export, stream_data_export, data_export_available,
+    EXPORT_DIR, DATA_EXPORTS, COMPRESSED_FORMATS
+)
+import metrics
 
 app = Flask(__name__)
 CORS(app)
-
-def get_db_connection():
-    conn = mysql.connector.connect(
-        user=os.getenv("MYSQLUSER", "root"),
-        password=os.getenv("MYSQLPASSWORD", ""),
-        database=os.getenv("MYSQLDATABASE", "schedopt_db"),
-        host=os.getenv("MYSQLHOST", "localhost"),
-        port=int(os.getenv("MYSQLPORT", 3306))
-    )
-    return conn
+metrics.install(app)
 
 @app.route('/download_templates', methods=['GET'])
 def download_templates():
@@ -40,31 +39,14 @@ def download_templates():
 def home():
     return "Hello Admin! API works"
 
-# --- Table check function (reusable) ---
-def check_all_tables():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    table_map = {
-        "Forecasting": "tbl_forecasted_enrolled",
-        "Programs": "tbl_program_department",
-        "Prospectus": "tbl_prospectus_list",
-        "Rooms": "tbl_room_data",
-        "Timeslots": "tbl_time_slot",
-        "Days": "tbl_day_slot"
-    }
-
-    results = {}
-    for name, table in table_map.items():
-        cursor.execute(f"SELECT COUNT(*) FROM {table}")
-        count = cursor.fetchone()[0]
-        results[name] = "success" if count > 0 else "failed"
-        if results[name] == "failed":
-            break   # stop at first failure
-
-    cursor.close()
-    conn.close()
-    return results
+# --- Database pool health and metrics ---
+@app.route('/db_health', methods=['GET'])
+def db_health():
+    try:
+        return jsonify(check_health())
+    except Exception as e:
+        print("Database health check failed:", str(e))
+        return jsonify({'status': 'error', 'error': str(e)}), 503
 
 # --- Check if tables have data ---
 @app.route('/check_tables', methods=['GET'])
@@ -81,7 +63,10 @@ def check_tables():
 def run_scheduling():
     try:
         data = request.get_json(silent=True) or {}
-        semester = data.get("semester", 1)
+        try:
+            semester = int(data.get("semester", 1))
+        except (TypeError, ValueError):
+            semester = 1
 
 
         results = check_all_tables()
@@ -92,28 +77,35 @@ def run_scheduling():
                 "message": f"Failed. {failed_table} values not verified. Please check one more time."
             }), 400
 
-        BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-        scripts = [
-            os.path.join(BASE_DIR, "section.py"),
-            os.path.join(BASE_DIR, "course_section.py"),
-            os.path.join(BASE_DIR, "final_assignment.py")
-        ]
-
-        for script in scripts:
-            result = subprocess.run(
-                ["python", script, str(semester)],  # ✅ pass semester as arg
-                capture_output=True,
-                text=True
+        force = bool(data.get("force", False))
+        try:
+            # Duplicate clicks for the same semester attach to the running pipeline
+            run, coalesced = flights.do(
+                ("run_scheduling", semester),
+                lambda cancel_token: run_pipeline(semester, force=force, cancel_token=cancel_token)
             )
-            if result.returncode != 0:
-                return jsonify({
-                    "status": "error",
-                    "message": f"Script {os.path.basename(script)} failed:\n{result.stderr}"
-                }), 500
+        except RunCancelled:
+            return jsonify({
+                "status": "cancelled",
+                "message": f"Scheduling for semester {semester} was cancelled."
+            }), 409
+        except StageError as e:
+            print(traceback.format_exc())
+            return jsonify({
+                "status": "error",
+                "message": str(e)
+            }), 500
 
+        if run["cache_hit"]:
+            message = f"Inputs unchanged for semester {semester}; restored the previous scheduling result."
+        else:
+            message = f"All scheduling scripts executed successfully for semester {semester}."
         return jsonify({
             "status": "success",
-            "message": f"All scheduling scripts executed successfully for semester {semester}."
+            "message": message,
+            "cache_hit": run["cache_hit"],
+            "fingerprint": run["fingerprint"],
+            "coalesced": coalesced
         })
 
     except Exception as e:
@@ -122,36 +114,59 @@ def run_scheduling():
             "message": str(e)
         }), 500
 
+
+# --- Cancel an in-flight scheduling run ---
+@app.route('/cancel_scheduling', methods=['POST'])
+def cancel_scheduling():
+    data = request.get_json(silent=True) or {}
+    semester = data.get("semester")
+    try:
+        semester = int(semester) if semester is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "Invalid semester"}), 400
+
+    cancelled = flights.cancel(
+        lambda key: key[0] == "run_scheduling" and (semester is None or key[1] == semester)
+    )
+    if not cancelled:
+        return jsonify({"status": "idle", "message": "No scheduling run in progress."}), 404
+    return jsonify({
+        "status": "cancelling",
+        "message": "Cancellation requested; the run stops after the current section.",
+        "semesters": [key[1] for key in cancelled]
+    })
+
+
+# --- Live progress of scheduling runs (server-sent events) ---
+@app.route('/scheduling_progress', methods=['GET'])
+def scheduling_progress():
+    return Response(
+        stream_with_context(stream_events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
         
-# Update the export route in app.py
+# --- Export the final schedule (cached per schedule version) ---
 @app.route('/export', methods=['POST'])
 def run_export():
     try:
         print("Starting export process...")
         
-        # Get the absolute path to the export script
-        BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-        export_script = os.path.join(BASE_DIR, "export.py")
-        
-        # Run the export script
-        result = subprocess.run(
-            ["python", export_script],
-            capture_output=True,
-            text=True
-        )
+        # Concurrent requests share one build; unchanged schedules are served from the cache
+        result, _ = flights.do(("export",), lambda cancel_token: build_exports())
         
-        if result.returncode == 0:
-            print("Export completed successfully")
-            return jsonify({
-                "status": "success",
-                "message": "Export completed successfully."
-            })
+        if result["cached"]:
+            print(f"Export served from cache for schedule version {result['version']}")
         else:
-            print(f"Export script error: {result.stderr}")
-            return jsonify({
-                "status": "error",
-                "message": f"Export script failed: {result.stderr}"
-            }), 500
+            print("Export completed successfully")
+        return jsonify({
+            "status": "success",
+            "message": "Export completed successfully.",
+            "cached": result["cached"],
+            "version": result["version"],
+            "files": result["files"]
+        })
             
     except Exception as e:
         print(f"Error in export endpoint: {str(e)}")
@@ -160,7 +175,22 @@ def run_export():
             "message": f"Export endpoint failed: {str(e)}"
         }), 500
 
-# Update the download route with better error handling
+def download_data_export(filename, data_format):
+    """Chunked CSV / JSON Lines / Parquet download, gzipped when the client accepts it"""
+    if not data_export_available(data_format):
+        return jsonify({"error": f"{data_format} export is not available on this server"}), 501
+    
+    compress = 'gzip' in request.accept_encodings and data_format not in COMPRESSED_FORMATS
+    chunks, mimetype = stream_data_export(data_format, compress=compress)
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+# Download an export artifact (the old fixed names map onto the latest export)
 @app.route('/download/<filename>', methods=['GET'])
 def download_file(filename):
     try:
@@ -170,13 +200,18 @@ def download_file(filename):
         if '..' in filename or filename.startswith('/'):
             return jsonify({"error": "Invalid filename"}), 400
             
+        # Machine-readable exports are streamed straight from the database
+        if filename in DATA_EXPORTS:
+            return download_data_export(filename, DATA_EXPORTS[filename])
+            
         # Check if file exists
-        if not os.path.exists(filename):
+        artifact = resolve_export(filename)
+        if artifact is None:
             print(f"File not found: {filename}")
             return jsonify({"error": f"File not found: {filename}"}), 404
             
-        print(f"Sending file: {filename}")
-        return send_file(filename, as_attachment=True)
+        print(f"Sending file: {artifact}")
+        return send_from_directory(EXPORT_DIR, artifact, as_attachment=True, download_name=filename)
     except Exception as e:
         print(f"Error downloading file {filename}: {str(e)}")
         print(traceback.format_exc())
@@ -189,6 +224,9 @@ def download_file(filename):
 # Register routers
 app.register_blueprint(upload_bp)
 app.register_blueprint(save_bp)
+app.register_blueprint(bundle_bp)
+app.register_blueprint(schedule_bp)
+app.register_blueprint(rooms_bp)
 
 if __name__ == '__main__':
     app.run(debug=True, host="0.0.0.0", port=8080)
@@ -0,0 +1,80 @@
+"""Benchmark the export stages on synthetic schedules.
+
+Usage: python bench_export.py [--sizes 1000,10000,50000] [--stages process,excel,word]
+
+Builds a fake tbl_final_assignment frame of each size (no database
+needed), then times every selected export stage so scaling with the
+number of assignments is easy to see.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+import export
+
+DAYS = ['MTh', 'TF', 'WS', 'M', 'T', 'W', 'S']
+TIMES = [('7:30 AM', '8:50 AM'), ('9:00 AM', '10:20 AM'), ('10:30 AM', '11:50 AM'),
+         ('1:00 PM', '2:20 PM'), ('2:30 PM', '3:50 PM'), ('4:00 PM', '5:20 PM')]
+DEPARTMENTS = ['CSITE', 'SLA', 'SMA', 'SED', 'CON']
+
+
+def synthetic_assignments(size, seed=7):
+    """Rows shaped like tbl_final_assignment"""
+    rng = random.Random(seed)
+    programs = list(export.PROGRAM_NAMES)
+    rows = []
+    for i in range(size):
+        year = rng.randint(1, 4)
+        course = f"C{rng.randint(100, 100 + max(size // 20, 10))}"
+        sections = ", ".join(
+            f"{rng.choice(programs)}-{year}-{rng.choice('ABC')}" for _ in range(rng.randint(1, 3))
+        )
+        start, end = rng.choice(TIMES)
+        rows.append({
+            'fa_course_section': f"{course}-{year}-{chr(65 + i % 26)}",
+            'fa_program_section': sections,
+            'fa_student_count': rng.randint(10, 40),
+            'fa_department': rng.choice(DEPARTMENTS),
+            'fa_room_code': f"R{rng.randint(100, 400)}",
+            'fa_day_abbr': rng.choice(DAYS),
+            'fa_start_time': start,
+            'fa_end_time': end,
+            'fa_course_year': year,
+            'fa_final_timeslot': f"{start} - {end}"
+        })
+    return pd.DataFrame(rows)
+
+
+def timed(label, fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    print(f"  {label:<14} {time.perf_counter() - started:8.3f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--stages", default="process,excel,word")
+    args = parser.parse_args()
+    stages = set(args.stages.split(","))
+
+    workdir = tempfile.mkdtemp(prefix="bench_export_")
+    os.chdir(workdir)
+    for size in (int(s) for s in args.sizes.split(",")):
+        df = synthetic_assignments(size)
+        print(f"{size} assignments:")
+        processed = timed("process_data", export.process_data, df)
+        if "excel" in stages:
+            timed("excel", export.create_excel_file, "Final_Assignments_Sorted.xlsx", processed)
+        if "word" in stages:
+            timed("word", export.create_word_file, "Final_Assignments_Sorted.docx", processed)
+    print(f"Output written to {workdir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Measure the import cost of the API process.
+
+Usage: python bench_startup.py [--runs N] [--budget-ms MS] [--top N]
+
+Each run imports app.py in a fresh interpreter with -X importtime and
+reports the median total, the slowest top-level imports and whether
+any lazily loaded dependency slipped back into start-up. Exits with a
+non-zero status when the median exceeds the budget (IMPORT_BUDGET_MS).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Heavy packages that only specific routes need; start-up must not import them
+LAZY_MODULES = ["pandas", "openpyxl", "docx"]
+
+
+def measure_once():
+    """Import app in a fresh interpreter.
+
+    Returns the total microseconds, the cumulative cost of each module
+    app.py imports directly and the lazy modules that got loaded anyway.
+    """
+    probe = "import sys, app; print(','.join(m for m in %r if m in sys.modules))" % (LAZY_MODULES,)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        capture_output=True, text=True, cwd=BASE_DIR
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+
+    # importtime lists children before their parent; depth is two spaces per level
+    total, children, pending = 0, {}, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        name = name[1:].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 1:
+            pending[name.strip()] = int(cumulative)
+        elif depth == 0:
+            if name == "app":
+                total, children = int(cumulative), pending
+            pending = {}
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return total, children, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", 500)))
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    totals = []
+    for _ in range(args.runs):
+        total, children, loaded = measure_once()
+        totals.append(total)
+
+    median_ms = statistics.median(totals) / 1000
+    print(f"import app: median {median_ms:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+
+    print("Slowest imports made by app.py:")
+    for name, us in sorted(children.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {name:<30} {us / 1000:8.1f} ms")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: lazily loaded modules imported at start-up: {', '.join(loaded)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"FAIL: start-up import time {median_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
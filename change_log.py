@@ -0,0 +1,120 @@
+import json
+import threading
+
+from db import get_connection
+
+# Version of the imported source tables and the row changes behind each version
+CHANGE_LOG_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS tbl_data_version (
+        dv_id TINYINT NOT NULL PRIMARY KEY,
+        dv_version BIGINT NOT NULL,
+        dv_updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # dc_key is the JSON list of the row's natural key; 'reload' rows have none
+    """
+    CREATE TABLE IF NOT EXISTS tbl_data_change (
+        dc_id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        dc_version BIGINT NOT NULL,
+        dc_table VARCHAR(64) NOT NULL,
+        dc_action VARCHAR(8) NOT NULL,
+        dc_key VARCHAR(512) NULL,
+        dc_changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        KEY idx_dc_version (dc_version),
+        KEY idx_dc_table_version (dc_table, dc_version)
+    )
+    """,
+]
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def ensure_change_schema():
+    """Create the version and change log tables once per process"""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            for ddl in CHANGE_LOG_DDL:
+                cursor.execute(ddl)
+            # Seeded here so concurrent first saves only ever UPDATE the row
+            cursor.execute("INSERT IGNORE INTO tbl_data_version (dv_id, dv_version) VALUES (1, 0)")
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+        _schema_ready = True
+
+
+def current_version(cursor):
+    cursor.execute("SELECT dv_version FROM tbl_data_version WHERE dv_id = 1")
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def record_changes(cursor, changes):
+    """Bump the data version and log {table: [(action, key), ...]} under it (the caller commits).
+
+    Nothing is written when no table changed; the current version is returned then.
+    """
+    rows = [(table, action, None if key is None else json.dumps(list(key), default=str))
+            for table, entries in changes.items() for action, key in entries]
+    if not rows:
+        return current_version(cursor)
+
+    # The row lock taken here orders concurrent saves, keeping versions monotonic
+    cursor.execute(
+        "UPDATE tbl_data_version SET dv_version = dv_version + 1, dv_updated_at = CURRENT_TIMESTAMP "
+        "WHERE dv_id = 1"
+    )
+    version = current_version(cursor)
+    cursor.executemany(
+        "INSERT INTO tbl_data_change (dc_version, dc_table, dc_action, dc_key) VALUES (%s, %s, %s, %s)",
+        [(version, table, action, key) for table, action, key in rows]
+    )
+    return version
+
+
+def get_data_version():
+    """Current version of the imported tables (0 before the first change)"""
+    ensure_change_schema()
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        return current_version(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def changes_since(version, upto, after_id=0, limit=1000):
+    """Logged changes after a data version up to upto, oldest first, with whether more follow.
+
+    Pass the id of the last change seen as after_id to read the next page.
+    """
+    ensure_change_schema()
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT dc_id, dc_version, dc_table, dc_action, dc_key FROM tbl_data_change "
+            "WHERE dc_version > %s AND dc_version <= %s AND dc_id > %s ORDER BY dc_id LIMIT %s",
+            (version, upto, after_id, limit + 1)
+        )
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+    changes = [
+        {'id': change_id, 'version': row_version, 'table': table, 'action': action,
+         'key': None if key is None else json.loads(key)}
+        for change_id, row_version, table, action, key in rows[:limit]
+    ]
+    return changes, len(rows) > limit
@@ -0,0 +1,223 @@
+import os
+import sqlite3
+import threading
+import time
+from mysql.connector import pooling
+import mysql.connector
+from dotenv import load_dotenv
+
+import metrics
+
+# Load environment variables
+load_dotenv()
+
+# "mysql" (default) or "sqlite" for an embedded database file per run or benchmark
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "schedopt.sqlite3")
+
+# Errors raised by either backend
+Error = (mysql.connector.Error, sqlite3.Error)
+
+# Pool settings (override through .env)
+POOL_NAME = os.getenv("DB_POOL_NAME", "schedopt_pool")
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+
+# Let bulk loads use LOAD DATA LOCAL INFILE (the server must allow local_infile too)
+LOCAL_INFILE = os.getenv("DB_LOCAL_INFILE", "0") == "1" and DB_BACKEND == "mysql"
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(POOL_SIZE)
+_stats_lock = threading.Lock()
+_stats = {
+    'checkouts': 0,
+    'in_use': 0,
+    'peak_in_use': 0,
+    'waits': 0,
+    'wait_seconds': 0.0,
+    'timeouts': 0,
+    'errors': 0,
+}
+
+
+def get_db_config():
+    """Connection settings shared by the app, the blueprints and the pipeline"""
+    config = {
+        'host': os.getenv("MYSQLHOST", "localhost"),
+        'user': os.getenv("MYSQLUSER", "root"),
+        'password': os.getenv("MYSQLPASSWORD", ""),
+        'database': os.getenv("MYSQLDATABASE", "schedopt_db"),
+        'port': int(os.getenv("MYSQLPORT", 3306))
+    }
+    if LOCAL_INFILE:
+        config['allow_local_infile'] = True
+    return config
+
+
+def get_pool():
+    """Create the connection pool on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = pooling.MySQLConnectionPool(
+                    pool_name=POOL_NAME,
+                    pool_size=POOL_SIZE,
+                    pool_reset_session=True,
+                    **get_db_config()
+                )
+    return _pool
+
+
+def _bump(key, amount=1):
+    with _stats_lock:
+        _stats[key] += amount
+
+
+class TimedCursor:
+    """Cursor wrapper feeding statement counts and latency into metrics"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
+
+    def _timed(self, method, operation, *args, **kwargs):
+        kind = operation.lstrip().split(None, 1)[0].upper() if operation.strip() else "UNKNOWN"
+        started = time.perf_counter()
+        try:
+            return method(operation, *args, **kwargs)
+        finally:
+            metrics.db_latency.observe(time.perf_counter() - started, operation=kind)
+            metrics.db_queries.inc(operation=kind)
+
+    def execute(self, operation, *args, **kwargs):
+        return self._timed(self._cursor.execute, operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._timed(self._cursor.executemany, operation, *args, **kwargs)
+
+
+class PooledConnection:
+    """Pooled connection handle; close() hands the connection back to the pool"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._closed = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._conn.cursor(*args, **kwargs))
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._conn.close()
+        finally:
+            with _stats_lock:
+                _stats['in_use'] -= 1
+            _slots.release()
+
+    def __del__(self):
+        # Safety net for handles dropped on an error path without close()
+        if not self._closed:
+            self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _open():
+    if DB_BACKEND == "sqlite":
+        import sqlite_backend
+
+        return sqlite_backend.connect(SQLITE_PATH, timeout=POOL_TIMEOUT)
+    return get_pool().get_connection()
+
+
+def get_connection():
+    """Borrow a connection from the shared pool, waiting up to DB_POOL_TIMEOUT seconds.
+
+    The pool pings each connection on checkout and reconnects dropped ones.
+    With DB_BACKEND=sqlite a connection to SQLITE_PATH is opened instead,
+    still bounded by the same POOL_SIZE slots.
+    """
+    if not _slots.acquire(blocking=False):
+        _bump('waits')
+        started = time.perf_counter()
+        acquired = _slots.acquire(timeout=POOL_TIMEOUT)
+        _bump('wait_seconds', time.perf_counter() - started)
+        if not acquired:
+            _bump('timeouts')
+            raise pooling.PoolError(f"No connection available in pool '{POOL_NAME}' after {POOL_TIMEOUT}s")
+
+    try:
+        conn = _open()
+    except Exception:
+        _bump('errors')
+        _slots.release()
+        raise
+
+    with _stats_lock:
+        _stats['checkouts'] += 1
+        _stats['in_use'] += 1
+        _stats['peak_in_use'] = max(_stats['peak_in_use'], _stats['in_use'])
+    return PooledConnection(conn)
+
+
+def pool_stats():
+    """Snapshot of pool usage counters"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['backend'] = DB_BACKEND
+    stats['pool_name'] = POOL_NAME
+    stats['pool_size'] = POOL_SIZE
+    stats['available'] = POOL_SIZE - stats['in_use']
+    return stats
+
+
+def check_health():
+    """Run a trivial query through the pool and report latency with the pool metrics"""
+    started = time.perf_counter()
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+    return {
+        'status': 'ok',
+        'latency_ms': round((time.perf_counter() - started) * 1000, 2),
+        'pool': pool_stats()
+    }
+
+
+metrics.register(metrics.GaugeCallback(
+    "schedopt_db_pool_in_use", "Pooled connections currently borrowed",
+    lambda: pool_stats()['in_use']))
+metrics.register(metrics.GaugeCallback(
+    "schedopt_db_pool_size", "Configured connection pool size",
+    lambda: POOL_SIZE))
+metrics.register(metrics.GaugeCallback(
+    "schedopt_db_pool_waits_total", "Checkouts that had to wait for a free connection",
+    lambda: pool_stats()['waits'], metric_type="counter"))
@@ -1,19 +1,19 @@
+import csv
+import io
+import json
+
 import pandas as pd
-import mysql.connector
 from openpyxl import Workbook
-from openpyxl.styles import Alignment
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, NamedStyle
+from openpyxl.utils import get_column_letter
 from docx import Document
 from docx.shared import Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_TABLE_ALIGNMENT
 
-# Database connection parameters
-db_config = {
-    'host': '127.0.0.1',
-    'user': 'root',
-    'password': '',
-    'database': 'schedopt_db'
-}
+from db import get_connection
+from models import FinalAssignment
 
 # Mapping of program acronyms to full names
 PROGRAM_NAMES = {
@@ -43,166 +43,259 @@ PROGRAM_NAMES = {
     'SMA': 'School of Management and Accountancy'
 }
 
-def get_data_from_db():
-    """Fetch data from the tbl_final_assignment table"""
+# Raw tbl_final_assignment columns for the machine-readable exports
+DATA_COLUMNS = list(FinalAssignment.COLUMNS)
+INTEGER_COLUMNS = {'fa_student_count', 'fa_course_year'}
+DATA_CHUNK_SIZE = 1000
+
+# Columns the Excel and Word exports need (the timeslot is rebuilt from the start and end times)
+EXPORT_COLUMNS = [column for column in DATA_COLUMNS if column != 'fa_final_timeslot']
+
+# Row order of the Excel layout: department, course code, year
+EXCEL_ORDER = "fa_department, SUBSTRING_INDEX(fa_course_section, '-', 1), fa_course_year, fa_course_section"
+
+def word_order():
+    """ORDER BY and parameters of the Word layout: program name, year, section"""
+    # Program is the full name of the first program section's code, as in process_data
+    first_code = "TRIM(SUBSTRING_INDEX(SUBSTRING_INDEX(fa_program_section, ',', 1), '-', 1))"
+    cases = " ".join(["WHEN %s THEN %s"] * len(PROGRAM_NAMES))
+    params = [value for code_and_name in PROGRAM_NAMES.items() for value in code_and_name]
+    order_by = (f"CASE {first_code} {cases} ELSE {first_code} END, "
+                "fa_course_year, RIGHT(fa_course_section, 1), fa_course_section")
+    return order_by, params
+
+def _read_chunks(conn, cursor, chunk_size):
     try:
-        conn = mysql.connector.connect(**db_config)
-        query = "SELECT * FROM tbl_final_assignment"
-        df = pd.read_sql(query, conn)
+        rows = cursor.fetchmany(chunk_size)
+        while rows:
+            yield rows
+            rows = cursor.fetchmany(chunk_size)
+    finally:
+        try:
+            # A download that stopped early leaves rows unread on the connection
+            while cursor.fetchmany(chunk_size):
+                pass
+        except Exception:
+            pass
+        cursor.close()
         conn.close()
-        return df
-    except Exception as e:
-        print(f"Error fetching data from database: {e}")
-        return None
+
+def iter_assignment_chunks(columns=DATA_COLUMNS, order_by="fa_course_section", params=(),
+                           chunk_size=DATA_CHUNK_SIZE):
+    """Rows of tbl_final_assignment in chunks, read straight off the cursor.
+
+    The query runs before this returns, so database errors surface to the
+    caller instead of in the middle of a download.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SELECT {', '.join(columns)} FROM tbl_final_assignment ORDER BY {order_by}",
+            tuple(params)
+        )
+    except Exception:
+        cursor.close()
+        conn.close()
+        raise
+    return _read_chunks(conn, cursor, chunk_size)
+
+def iter_export_frames(order_by, params=(), chunk_size=DATA_CHUNK_SIZE):
+    """Processed frames of tbl_final_assignment, one per chunk, in SQL order"""
+    for rows in iter_assignment_chunks(EXPORT_COLUMNS, order_by, params, chunk_size):
+        yield process_data(pd.DataFrame.from_records(rows, columns=EXPORT_COLUMNS))
+
+def _frame_rows(frames, columns):
+    for frame in frames:
+        yield from frame[columns].itertuples(index=False, name=None)
+
+def _text(series):
+    """Column as strings, with missing values as empty strings"""
+    return series.astype(str).where(series.notna(), '')
+
 
 def process_data(df):
     """Process the data to extract course code, section, and handle multiple programs"""
-    processed_data = []
+    if df.empty:
+        return pd.DataFrame()
+
+    course_section = _text(df['fa_course_section'])
     
-    for _, row in df.iterrows():
-        # Extract section (last character of fa_course_section)
-        section = str(row['fa_course_section'])[-1] if pd.notna(row['fa_course_section']) else ''
-        
-        # Extract course code (everything before the first dash)
-        course_code = str(row['fa_course_section']).split('-')[0] if pd.notna(row['fa_course_section']) else ''
-        
-        # Get year from fa_course_year
-        year = f"Year {row['fa_course_year']}" if pd.notna(row['fa_course_year']) else 'Year 0'
-        
-        # Get day and merged timeslot
-        day = str(row['fa_day_abbr']) if pd.notna(row['fa_day_abbr']) else ''
-        
-        # Merge start and end times into timeslot
-        start_time = str(row['fa_start_time']) if pd.notna(row['fa_start_time']) else ''
-        end_time = str(row['fa_end_time']) if pd.notna(row['fa_end_time']) else ''
-        timeslot = f"{start_time} - {end_time}" if start_time and end_time else (start_time or end_time or '')
-        
-        room = str(row['fa_room_code']) if pd.notna(row['fa_room_code']) else ''
-        department = str(row['fa_department']) if pd.notna(row['fa_department']) else ''
-        
-        # Get program sections and student count
-        program_sections = str(row['fa_program_section']) if pd.notna(row['fa_program_section']) else ''
-        student_count = int(row['fa_student_count']) if pd.notna(row['fa_student_count']) else 0
-        
-        # Get the first program name for the Program column (just for display)
-        first_program = program_sections.split(',')[0].strip() if program_sections else ''
-        program_code = first_program.split('-')[0] if first_program else ''
-        program_name = PROGRAM_NAMES.get(program_code, program_code)
-        
-        processed_data.append({
-            'Department': department,
-            'Program': program_name,
-            'Program Section': program_sections,
-            'Student Count': student_count,
-            'Year': year,
-            'Course Code': course_code,
-            'Section': section,
-            'Day': day,
-            'Timeslot': timeslot,
-            'Room': room,
-            'fa_program_section': program_sections,
-            'fa_student_count': student_count
-        })
+    # Section is the last character, course code everything before the first dash
+    section = course_section.str[-1].fillna('')
+    course_code = course_section.str.split('-', n=1).str[0]
+    
+    # A chunk with a NULL year reads as floats; Int64 keeps the label 'Year 1', not 'Year 1.0'
+    course_year = pd.to_numeric(df['fa_course_year'], errors='coerce').astype('Int64')
+    year = ('Year ' + course_year.astype(str)).where(course_year.notna(), 'Year 0')
+    day = _text(df['fa_day_abbr'])
+    
+    # Merge start and end times into timeslot (or whichever one is present)
+    start_time = _text(df['fa_start_time'])
+    end_time = _text(df['fa_end_time'])
+    both = (start_time != '') & (end_time != '')
+    timeslot = (start_time + ' - ' + end_time).where(both, start_time.where(start_time != '', end_time))
+    
+    room = _text(df['fa_room_code'])
+    department = _text(df['fa_department'])
+    
+    program_sections = _text(df['fa_program_section'])
+    student_count = df['fa_student_count'].fillna(0).astype(int)
     
-    return pd.DataFrame(processed_data)
+    # The first program of the section list names the Program column (display only)
+    first_program = program_sections.str.split(',', n=1).str[0].str.strip()
+    program_code = first_program.str.split('-', n=1).str[0]
+    program_name = program_code.map(PROGRAM_NAMES).fillna(program_code)
+    
+    return pd.DataFrame({
+        'Department': department,
+        'Program': program_name,
+        'Program Section': program_sections,
+        'Student Count': student_count,
+        'Year': year,
+        'Course Code': course_code,
+        'Section': section,
+        'Day': day,
+        'Timeslot': timeslot,
+        'Room': room,
+        'fa_program_section': program_sections,
+        'fa_student_count': student_count
+    }).reset_index(drop=True).infer_objects()
+
+# Excel layout: sheet column headers and the DataFrame columns shown under each
+EXCEL_HEADERS = ['', '', 'Section', 'Program Section', 'Student Count', 'Day', 'Timeslot', 'Room']
+EXCEL_COLUMN_SOURCES = [
+    ['Department'], ['Course Code'], ['Year', 'Section'], ['fa_program_section'],
+    ['fa_student_count'], ['Day'], ['Timeslot'], ['Room']
+]
+
+# Length of each sheet column's values as process_data renders them, measured in SQL.
+# The section letter shares its column with the 'Year N' label, which is always longer.
+EXCEL_COLUMN_LENGTHS = [
+    "CHAR_LENGTH(fa_department)",
+    "CHAR_LENGTH(SUBSTRING_INDEX(fa_course_section, '-', 1))",
+    "5 + CHAR_LENGTH(COALESCE(fa_course_year, 0))",
+    "CHAR_LENGTH(fa_program_section)",
+    "CHAR_LENGTH(COALESCE(fa_student_count, 0))",
+    "CHAR_LENGTH(fa_day_abbr)",
+    "COALESCE(CHAR_LENGTH(NULLIF(fa_start_time, '')), 0) + COALESCE(CHAR_LENGTH(NULLIF(fa_end_time, '')), 0)"
+    " + CASE WHEN fa_start_time <> '' AND fa_end_time <> '' THEN 3 ELSE 0 END",
+    "CHAR_LENGTH(fa_room_code)",
+]
+
+def _widths(lengths):
+    return [(max(length or 0, len(header)) + 2) * 1.2 for length, header in zip(lengths, EXCEL_HEADERS)]
+
+def excel_column_widths(frames):
+    """Column widths from the longest value each sheet column will hold"""
+    lengths = [0] * len(EXCEL_HEADERS)
+    for frame in frames:
+        if frame.empty:
+            continue
+        for index, sources in enumerate(EXCEL_COLUMN_SOURCES):
+            for source in sources:
+                lengths[index] = max(lengths[index], int(frame[source].astype(str).str.len().max()))
+    return _widths(lengths)
+
+def excel_column_widths_from_db():
+    """excel_column_widths() of tbl_final_assignment in one aggregate query"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SELECT {', '.join(f'MAX({length})' for length in EXCEL_COLUMN_LENGTHS)} FROM tbl_final_assignment"
+        )
+        return _widths(cursor.fetchone())
+    finally:
+        cursor.close()
+        conn.close()
+
+def create_excel_file(excel_file="Final_Assignments_Sorted.xlsx", df=None):
+    """Create Excel workbook with sorted data by Department, Course Code, and Year Level.
 
-def create_excel_file(df):
-    """Create Excel workbook with sorted data by Department, Course Code, and Year Level"""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Sheet1"
+    Renders the processed frame df when given, otherwise streams
+    tbl_final_assignment in chunks, already sorted by the database.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
     
-    # Sort the DataFrame by Department, Course Code, and Year Level
-    df_sorted = df.sort_values(by=['Department', 'Course Code', 'Year'])
+    # One shared style instead of a separate alignment per cell
+    centered = NamedStyle(name='centered', alignment=Alignment(horizontal='center'))
+    wb.add_named_style(centered)
     
-    # Remove duplicate rows (keeping only one entry per course section)
-    df_sorted = df_sorted.drop_duplicates(subset=['Department', 'Course Code', 'Section', 'Year', 'Day', 'Timeslot', 'Room'])
+    def row(*values):
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = 'centered'
+            cells.append(cell)
+        return cells
     
-    current_row = 1
+    # A write-only sheet emits its column definitions before the first row,
+    # so widths are measured before any row is streamed out
+    if df is not None:
+        # Sort the DataFrame by Department, Course Code, and Year Level
+        frames = [df.sort_values(by=['Department', 'Course Code', 'Year'])]
+        widths = excel_column_widths(frames)
+    else:
+        widths = excel_column_widths_from_db()
+        frames = iter_export_frames(EXCEL_ORDER)
+    for col_num, width in enumerate(widths, start=1):
+        ws.column_dimensions[get_column_letter(col_num)].width = width
     
-    # Get unique departments in sorted order
-    departments = sorted(df['Department'].unique())
+    columns = ['Department', 'Course Code', 'Year', 'Section', 'fa_program_section',
+               'fa_student_count', 'Day', 'Timeslot', 'Room']
     
-    for department in departments:
-        # Write department header
-        ws.cell(row=current_row, column=1, value=department)
-        current_row += 1
-        
-        # Get courses for this department in sorted order
-        dept_courses = sorted(df_sorted[df_sorted['Department'] == department]['Course Code'].unique())
-        
-        for course in dept_courses:
-            # Write course code header
-            ws.cell(row=current_row, column=2, value=course)
-            current_row += 1
+    # One pass over the sorted rows; headers are written whenever a level changes
+    current_department = current_course = current_year = None
+    group_open = False
+    for (department, course, year, section, program_section, student_count,
+         day, timeslot, room) in _frame_rows(frames, columns):
+        if not group_open or (department, course, year) != (current_department, current_course, current_year):
+            if group_open:
+                # Add empty row after each year
+                ws.append(row(None, None, ''))
             
-            # Get years for this course in sorted order
-            course_years = sorted(df_sorted[(df_sorted['Department'] == department) & 
-                                          (df_sorted['Course Code'] == course)]['Year'].unique())
+            if department != current_department:
+                # Write department header
+                ws.append(row(department))
+                current_course = None
             
-            for year in course_years:
-                # Write year level header
-                ws.cell(row=current_row, column=3, value=year)
-                current_row += 1
-                
-                # Write column headers
-                headers = ['', '', 'Section', 'Program Section', 'Student Count', 'Day', 'Timeslot', 'Room']
-                for col_num, header in enumerate(headers, start=1):
-                    ws.cell(row=current_row, column=col_num, value=header)
-                current_row += 1
-                
-                # Get sections for this department, course and year
-                sections = df_sorted[(df_sorted['Department'] == department) & 
-                                   (df_sorted['Course Code'] == course) & 
-                                   (df_sorted['Year'] == year)]
-                
-                if sections.empty:
-                    # Add empty row if no sections
-                    ws.cell(row=current_row, column=3, value='')
-                    current_row += 1
-                else:
-                    # Write section data
-                    for _, section in sections.iterrows():
-                        ws.cell(row=current_row, column=3, value=section['Section'])
-                        ws.cell(row=current_row, column=4, value=section['fa_program_section'])
-                        ws.cell(row=current_row, column=5, value=section['fa_student_count'])
-                        ws.cell(row=current_row, column=6, value=section['Day'])
-                        ws.cell(row=current_row, column=7, value=section['Timeslot'])
-                        ws.cell(row=current_row, column=8, value=section['Room'])
-                        current_row += 1
-                
-                # Add empty row after each year
-                ws.cell(row=current_row, column=3, value='')
-                current_row += 1
-    
-    # Adjust column widths
-    for col in ws.columns:
-        max_length = 0
-        column = col[0].column_letter
+            if course != current_course:
+                # Write course code header
+                ws.append(row(None, course))
+            
+            # Write year level header followed by the column headers
+            ws.append(row(None, None, year))
+            ws.append(row(*EXCEL_HEADERS))
+            
+            current_department, current_course, current_year = department, course, year
+            group_open = True
+            seen = set()
         
-        for cell in col:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
+        # Skip duplicate rows (keeping only one entry per course section)
+        if (section, day, timeslot, room) in seen:
+            continue
+        seen.add((section, day, timeslot, room))
         
-        adjusted_width = (max_length + 2) * 1.2
-        ws.column_dimensions[column].width = adjusted_width
+        # Write section data
+        ws.append(row(None, None, section, program_section, student_count, day, timeslot, room))
     
-    # Center align all cells
-    for row in ws.iter_rows():
-        for cell in row:
-            cell.alignment = Alignment(horizontal='center')
+    if group_open:
+        # Add empty row after the last year
+        ws.append(row(None, None, ''))
     
     # Save the Excel file
-    excel_file = "Final_Assignments_Sorted.xlsx"
     wb.save(excel_file)
     print(f"Excel file created: {excel_file}")
     return excel_file
 
-def create_word_file(df):
-    """Create Word document with sorted data (Times New Roman 12pt, no borders)"""
+def create_word_file(word_file="Final_Assignments_Sorted.docx", df=None):
+    """Create Word document with sorted data (Times New Roman 12pt, no borders).
+
+    Renders the processed frame df when given, otherwise streams
+    tbl_final_assignment in chunks, already sorted by the database.
+    """
     doc = Document()
     
     # Set default font to Times New Roman 12pt
@@ -211,96 +304,164 @@ def create_word_file(df):
     font.name = 'Times New Roman'
     font.size = Pt(12)
     
-    # Sort the DataFrame by Program, Year, and Section (A-Z)
-    df_sorted = df.sort_values(by=['Program', 'Year', 'Section'])
-    
-    # Remove duplicate rows (keeping only one entry per course section)
-    df_sorted = df_sorted.drop_duplicates(subset=['Program', 'Course Code', 'Section', 'Year', 'Day', 'Timeslot', 'Room'])
+    if df is not None:
+        # Sort the DataFrame by Program, Year, and Section (A-Z)
+        frames = [df.sort_values(by=['Program', 'Year', 'Section'])]
+    else:
+        frames = iter_export_frames(*word_order())
     
-    # Get unique programs in sorted order
-    programs = sorted(df['Program'].unique())
-    
-    for program in programs:
-        # Add program header (left aligned, bold)
-        p = doc.add_paragraph()
-        p.add_run(program).bold = True
-        p.alignment = WD_ALIGN_PARAGRAPH.LEFT
-        p.paragraph_format.space_after = Pt(6)
-        
-        # Get years for this program in sorted order
-        program_years = sorted(df[df['Program'] == program]['Year'].unique())
-        
-        for year in program_years:
+    # One pass over the sorted rows; a new header and table start whenever program or year changes
+    columns = ['Program', 'Year', 'Course Code', 'Section', 'Day', 'Timeslot', 'Room']
+    current_program = current_year = None
+    table = None
+    for program, year, course_code, section, day, timeslot, room in _frame_rows(frames, columns):
+        if table is None or (program, year) != (current_program, current_year):
+            if table is None or program != current_program:
+                # Add program header (left aligned, bold)
+                p = doc.add_paragraph()
+                p.add_run(program).bold = True
+                p.alignment = WD_ALIGN_PARAGRAPH.LEFT
+                p.paragraph_format.space_after = Pt(6)
+            
             # Add year header (left aligned, bold)
             p = doc.add_paragraph()
             p.add_run(year).bold = True
             p.alignment = WD_ALIGN_PARAGRAPH.LEFT
             p.paragraph_format.space_after = Pt(6)
             
-            # Create table for course data (borderless)
-            courses = df_sorted[(df_sorted['Program'] == program) & 
-                              (df_sorted['Year'] == year)]
+            # Add table (1 row for headers + data rows)
+            table = doc.add_table(rows=1, cols=5)
+            table.alignment = WD_TABLE_ALIGNMENT.CENTER
+            
+            # Remove all borders and set font
+            for row in table.rows:
+                for cell in row.cells:
+                    for paragraph in cell.paragraphs:
+                        for run in paragraph.runs:
+                            run.font.name = 'Times New Roman'
+                            run.font.size = Pt(12)
             
-            if not courses.empty:
-                # Add table (1 row for headers + data rows)
-                table = doc.add_table(rows=1, cols=5)
-                table.alignment = WD_TABLE_ALIGNMENT.CENTER
-                
-                # Remove all borders and set font
-                for row in table.rows:
-                    for cell in row.cells:
-                        for paragraph in cell.paragraphs:
-                            for run in paragraph.runs:
-                                run.font.name = 'Times New Roman'
-                                run.font.size = Pt(12)
-                
-                # Set header row
-                hdr_cells = table.rows[0].cells
-                hdr_cells[0].text = 'Course Code'
-                hdr_cells[1].text = 'Section'
-                hdr_cells[2].text = 'Day'
-                hdr_cells[3].text = 'Timeslot'
-                hdr_cells[4].text = 'Room'
-                
-                # Make headers bold and center aligned
-                for cell in hdr_cells:
-                    cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    for run in cell.paragraphs[0].runs:
-                        run.bold = True
-                
-                # Add course data
-                for _, course in courses.iterrows():
-                    row_cells = table.add_row().cells
-                    row_cells[0].text = str(course['Course Code']) if pd.notna(course['Course Code']) else ''
-                    row_cells[1].text = str(course['Section']) if pd.notna(course['Section']) else ''
-                    row_cells[2].text = str(course['Day']) if pd.notna(course['Day']) else ''
-                    row_cells[3].text = str(course['Timeslot']) if pd.notna(course['Timeslot']) else ''
-                    row_cells[4].text = str(course['Room']) if pd.notna(course['Room']) else ''
-                    
-                    # Center align all cells
-                    for cell in row_cells:
-                        cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+            # Set header row
+            hdr_cells = table.rows[0].cells
+            hdr_cells[0].text = 'Course Code'
+            hdr_cells[1].text = 'Section'
+            hdr_cells[2].text = 'Day'
+            hdr_cells[3].text = 'Timeslot'
+            hdr_cells[4].text = 'Room'
+            
+            # Make headers bold and center aligned
+            for cell in hdr_cells:
+                cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+                for run in cell.paragraphs[0].runs:
+                    run.bold = True
+            
+            current_program, current_year = program, year
+            seen = set()
+        
+        # Skip duplicate rows (keeping only one entry per course section)
+        if (course_code, section, day, timeslot, room) in seen:
+            continue
+        seen.add((course_code, section, day, timeslot, room))
+        
+        # Add course data
+        row_cells = table.add_row().cells
+        row_cells[0].text = str(course_code) if pd.notna(course_code) else ''
+        row_cells[1].text = str(section) if pd.notna(section) else ''
+        row_cells[2].text = str(day) if pd.notna(day) else ''
+        row_cells[3].text = str(timeslot) if pd.notna(timeslot) else ''
+        row_cells[4].text = str(room) if pd.notna(room) else ''
+        
+        # Center align all cells
+        for cell in row_cells:
+            cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
     
     # Save the Word document
-    word_file = "Final_Assignments_Sorted.docx"
     doc.save(word_file)
     print(f"Word document created: {word_file}")
     return word_file
 
+def stream_csv(chunks):
+    """CSV text with a header row, one piece per chunk"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(DATA_COLUMNS)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def stream_jsonl(chunks):
+    """One JSON object per assignment and line"""
+    for rows in chunks:
+        yield "".join(json.dumps(dict(zip(DATA_COLUMNS, row)), default=str) + "\n" for row in rows)
+
+class _ChunkSink:
+    """Write-only file object that hands the written bytes back to a generator"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+def stream_parquet(chunks):
+    """Parquet file with one row group per chunk (needs the optional pyarrow package)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        (column, pa.int64() if column in INTEGER_COLUMNS else pa.string()) for column in DATA_COLUMNS
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            arrays = [
+                list(values) if name in INTEGER_COLUMNS
+                else [None if value is None else str(value) for value in values]
+                for name, values in zip(DATA_COLUMNS, columns)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+# Format -> (streaming writer, MIME type)
+DATA_FORMATS = {
+    'csv': (stream_csv, 'text/csv'),
+    'jsonl': (stream_jsonl, 'application/x-ndjson'),
+    'parquet': (stream_parquet, 'application/vnd.apache.parquet'),
+}
+
 def main():
-    # Step 1: Get data from database
-    df = get_data_from_db()
-    if df is None:
-        return
-    
-    # Step 2: Process the data
-    processed_df = process_data(df)
-    
-    # Step 3: Create Excel file
-    excel_file = create_excel_file(processed_df)
-    
-    # Step 4: Create Word document
-    word_file = create_word_file(processed_df)
+    # Both files read tbl_final_assignment in chunks, sorted by the database
+    excel_file = create_excel_file()
+    word_file = create_word_file()
     
     print(f"\nSuccessfully created both files:")
     print(f"- Excel file: {excel_file}")
@@ -0,0 +1,186 @@
+import hashlib
+import importlib.util
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from result_cache import table_checksums
+from schedule_store import get_schedule_version
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join(BASE_DIR, "exports"))
+
+# Number of distinct exports kept on disk (oldest are removed first)
+EXPORT_KEEP = int(os.getenv("EXPORT_KEEP", 4))
+
+# Bump whenever the layout of an export changes, so older files are not served
+EXPORT_REVISION = 1
+
+# Artifact kind -> (file name prefix, extension); the builders live in export.py and timetable.py
+ARTIFACTS = {
+    "excel": ("Final_Assignments_Sorted", ".xlsx"),
+    "word": ("Final_Assignments_Sorted", ".docx"),
+    "timetable": ("Final_Timetables", ".xlsx"),
+}
+
+# Threads building the artifacts side by side; the writers are CPU bound, so
+# the default of 1 builds them in turn and more only pays off on slow reads
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", 1))
+
+# Fixed download names, mapped onto the latest export of that kind
+LEGACY_NAMES = {prefix + extension: kind for kind, (prefix, extension) in ARTIFACTS.items()}
+
+# Download names of the machine-readable exports -> format in export.DATA_FORMATS
+DATA_EXPORTS = {
+    "schedule.csv": "csv",
+    "schedule.jsonl": "jsonl",
+    "schedule.parquet": "parquet",
+}
+
+# Formats that are already compressed and are never gzipped again
+COMPRESSED_FORMATS = {"parquet"}
+
+_lock = threading.Lock()
+_latest = {"version": None, "content_hash": None, "files": {}}
+
+
+def content_hash():
+    """Hash of the current tbl_final_assignment contents and the export revision"""
+    checksum = table_checksums(["tbl_final_assignment"]).get("tbl_final_assignment")
+    return hashlib.sha256(f"revision-{EXPORT_REVISION}-{checksum}".encode("utf-8")).hexdigest()[:16]
+
+
+def artifact_name(kind, digest):
+    prefix, extension = ARTIFACTS[kind]
+    return f"{prefix}_{digest}{extension}"
+
+
+def _build(builder, final_path):
+    """Write one artifact under a temporary name and move it into place"""
+    started = time.monotonic()
+    temp_path = f"{final_path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        builder(temp_path)
+        os.replace(temp_path, final_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return os.path.basename(final_path), time.monotonic() - started
+
+
+def _prune(keep_files):
+    """Remove all but the EXPORT_KEEP newest exports of each kind"""
+    for kind, (prefix, extension) in ARTIFACTS.items():
+        paths = [
+            os.path.join(EXPORT_DIR, name) for name in os.listdir(EXPORT_DIR)
+            if name.startswith(prefix + "_") and name.endswith(extension)
+        ]
+        paths.sort(key=os.path.getmtime, reverse=True)
+        for path in paths[EXPORT_KEEP:]:
+            if os.path.basename(path) not in keep_files:
+                os.remove(path)
+
+
+def build_exports():
+    """Excel, Word and timetable exports of the current schedule, rebuilt only when it changed.
+
+    Returns a dict with the schedule version, the content hash, the file
+    names inside EXPORT_DIR and whether they were served from the cache.
+    """
+    version = get_schedule_version()
+    with _lock:
+        latest = dict(_latest)
+    if latest["version"] == version and all(
+        os.path.exists(os.path.join(EXPORT_DIR, name)) for name in latest["files"].values()
+    ):
+        return dict(latest, cached=True)
+
+    digest = content_hash()
+    files = {kind: artifact_name(kind, digest) for kind in ARTIFACTS}
+
+    # A new version with unchanged rows (e.g. a restored result) reuses the files on disk
+    cached = all(os.path.exists(os.path.join(EXPORT_DIR, name)) for name in files.values())
+    if not cached:
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        import export
+        import timetable
+
+        # Every builder streams tbl_final_assignment from the database itself
+        builders = {
+            "excel": export.create_excel_file,
+            "word": export.create_word_file,
+            "timetable": timetable.create_timetable_file,
+        }
+        paths = {kind: os.path.join(EXPORT_DIR, name) for kind, name in files.items()}
+        if EXPORT_WORKERS > 1:
+            # Threads, not processes: a process pool re-imports the app and the
+            # writer libraries on every cold export
+            with ThreadPoolExecutor(max_workers=EXPORT_WORKERS) as executor:
+                futures = {
+                    kind: executor.submit(_build, builder, paths[kind])
+                    for kind, builder in builders.items()
+                }
+                timings = {kind: future.result()[1] for kind, future in futures.items()}
+        else:
+            timings = {kind: _build(builder, paths[kind])[1] for kind, builder in builders.items()}
+        for kind, seconds in timings.items():
+            metrics.stage_duration.observe(seconds, stage=f"export_{kind}")
+        _prune(set(files.values()))
+
+    result = {"version": version, "content_hash": digest, "files": files}
+    with _lock:
+        _latest.update(result)
+    return dict(result, cached=cached)
+
+
+def resolve(filename):
+    """File name inside EXPORT_DIR for a download request, or None.
+
+    The fixed names the frontend used before are mapped onto the latest
+    artifact of that kind.
+    """
+    if filename in LEGACY_NAMES:
+        with _lock:
+            filename = _latest["files"].get(LEGACY_NAMES[filename])
+        if filename is None:
+            return None
+    if os.path.basename(filename) != filename:
+        return None
+    if not os.path.isfile(os.path.join(EXPORT_DIR, filename)):
+        return None
+    return filename
+
+
+def data_export_available(data_format):
+    """Parquet needs the optional pyarrow package"""
+    return data_format != "parquet" or importlib.util.find_spec("pyarrow") is not None
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)    # wbits 31 writes a gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_data_export(data_format, compress=False):
+    """Encoded chunks of a machine-readable export and its MIME type.
+
+    Rows are read from the database a chunk at a time, so memory stays
+    bounded whatever the size of the schedule.
+    """
+    import export
+
+    writer, mimetype = export.DATA_FORMATS[data_format]
+    chunks = (
+        piece.encode("utf-8") if isinstance(piece, str) else piece
+        for piece in writer(export.iter_assignment_chunks())
+    )
+    if compress and data_format not in COMPRESSED_FORMATS:
+        chunks = _gzip(chunks)
+    return chunks, mimetype
@@ -1,16 +1,28 @@
-import mysql.connector
-from mysql.connector import Error
 from collections import defaultdict
 from datetime import datetime, time
-import os
-from dotenv import load_dotenv
+from time import monotonic
 
-# Load environment variables
-load_dotenv()
+from db import get_connection, Error
+from models import CourseSection, Room, TimeSlot, DayPattern, Assignment, FinalAssignment, select_list, rows_as
+from progress import bus, PROGRESS_INTERVAL
+import metrics
+
+# Day abbreviations (single days and paired patterns) to the days they cover
+DAY_MAPPING = {
+    'M': ['Monday'],
+    'T': ['Tuesday'],
+    'W': ['Wednesday'],
+    'Th': ['Thursday'],
+    'F': ['Friday'],
+    'S': ['Saturday'],
+    'MTh': ['Monday', 'Thursday'],
+    'TF': ['Tuesday', 'Friday'],
+    'WS': ['Wednesday', 'Saturday']
+}
 
 class CourseScheduler:
-    def __init__(self, db_config):
-        self.db_config = db_config
+    def __init__(self, cancel_token=None):
+        self.cancel_token = cancel_token
         self.connection = None
         self.cursor = None
         self.assigned_sections = set()
@@ -19,22 +31,24 @@ class CourseScheduler:
         self.program_section_assignments = defaultdict(list)
         self.program_section_time_blocks = defaultdict(list)  # Track consecutive time blocks
         self.min_break_minutes = 80  # require at least one full 80-min slot as a break
+        self.max_consecutive_minutes = 170
 
         
     def connect(self):
-        """Establish database connection"""
+        """Borrow a connection from the shared pool"""
         try:
-            self.connection = mysql.connector.connect(**self.db_config)
-            self.cursor = self.connection.cursor(dictionary=True)
+            self.connection = get_connection()
+            self.cursor = self.connection.cursor()
             print("Database connection established")
         except Error as e:
             print(f"Error connecting to MySQL: {e}")
     
     def disconnect(self):
-        """Close database connection"""
-        if self.connection and self.connection.is_connected():
+        """Return the connection to the pool"""
+        if self.connection:
             self.cursor.close()
             self.connection.close()
+            self.connection = None
             print("Database connection closed")
     
     def clear_existing_assignments(self):
@@ -50,9 +64,8 @@ class CourseScheduler:
     def query_course_sections(self):
         """Retrieve all course sections that need scheduling"""
         try:
-            query = """
-                SELECT cs_course_section, cs_program_section, cs_student_count, 
-                    cs_department, cs_course_type, cs_units, cs_course_year
+            query = f"""
+                SELECT {select_list(CourseSection)}
                 FROM tbl_course_section
                 ORDER BY 
                     CASE 
@@ -64,7 +77,7 @@ class CourseScheduler:
                     cs_student_count DESC
             """
             self.cursor.execute(query)
-            return self.cursor.fetchall()
+            return rows_as(CourseSection, self.cursor)
         except Error as e:
             print(f"Error fetching course sections: {e}")
             return []
@@ -73,9 +86,8 @@ class CourseScheduler:
         """Retrieve available rooms based on course type requirements with program-specific prioritization"""
         try:
             # Base query for room data
-            room_query = """
-                SELECT rd_room_code, rd_type, rd_function, rd_capacity,
-                    rd_department_owner, rd_program_owner, rd_size
+            room_query = f"""
+                SELECT {select_list(Room)}
                 FROM tbl_room_data
                 WHERE rd_capacity >= %s
             """
@@ -204,7 +216,7 @@ class CourseScheduler:
                 return []
             
             self.cursor.execute(room_query, (student_count,))
-            all_rooms = self.cursor.fetchall()
+            all_rooms = rows_as(Room, self.cursor)
             
             # Determine preferred room size based on student count (for sorting only)
             if student_count <= 10:
@@ -224,22 +236,22 @@ class CourseScheduler:
                 
                 if program_section:
                     # BSNMCA should prioritize ANIMATION rooms
-                    if 'BSNMCA' in program_section and room['rd_function'] == 'ANIMATION':
+                    if 'BSNMCA' in program_section and room.function == 'ANIMATION':
                         is_program_specific = True
                     # BSCS should prioritize ADVANCED labs but also allow BASIC as program-specific
-                    elif 'BSCS' in program_section and (room['rd_function'] == 'ADVANCED' or room['rd_function'] == 'BASIC'):
+                    elif 'BSCS' in program_section and (room.function == 'ADVANCED' or room.function == 'BASIC'):
                         is_program_specific = True
                     # BSIT should prioritize BASIC labs but also allow ADVANCED as program-specific
-                    elif 'BSIT' in program_section and (room['rd_function'] == 'BASIC' or room['rd_function'] == 'ADVANCED'):
+                    elif 'BSIT' in program_section and (room.function == 'BASIC' or room.function == 'ADVANCED'):
                         is_program_specific = True
                     # BSMATH should prioritize MATH-specific labs
-                    elif 'BSMATH' in program_section and (room['rd_function'] == 'LAB' and room['rd_program_owner'] == 'BSMATH'):
+                    elif 'BSMATH' in program_section and (room.function == 'LAB' and room.program_owner == 'BSMATH'):
                         is_program_specific = True
                     # BSECE should prioritize ELECTRONICS or ENGINEERING labs
-                    elif 'BSECE' in program_section and (room['rd_function'] == 'ELECTRONICS' or room['rd_function'] == 'ENGINEERING'):
+                    elif 'BSECE' in program_section and (room.function == 'ELECTRONICS' or room.function == 'ENGINEERING'):
                         is_program_specific = True
                     # BSCPE should prioritize ELECTRONICS or ENGINEERING labs
-                    elif 'BSCPE' in program_section and (room['rd_function'] == 'ADVANCED' or room['rd_function'] == 'ENGINEERING'):
+                    elif 'BSCPE' in program_section and (room.function == 'ADVANCED' or room.function == 'ENGINEERING'):
                         is_program_specific = True
                 
                 if is_program_specific:
@@ -250,50 +262,44 @@ class CourseScheduler:
             # Sort program-specific rooms by size priority
             sorted_program_specific = []
             for size in size_priority:
-                size_rooms = [room for room in program_specific_rooms if room['rd_size'] == size]
+                size_rooms = [room for room in program_specific_rooms if room.size == size]
                 sorted_program_specific.extend(size_rooms)
             
             # Sort other rooms by size priority
             sorted_other_rooms = []
             for size in size_priority:
-                size_rooms = [room for room in other_rooms if room['rd_size'] == size]
+                size_rooms = [room for room in other_rooms if room.size == size]
                 sorted_other_rooms.extend(size_rooms)
             
             # Combine: program-specific rooms first, then others
             sorted_rooms = sorted_program_specific + sorted_other_rooms
             
             # Get all time slots that match our requirements
-            time_query = """
-                SELECT ts_start_time, ts_end_time, ts_duration 
+            time_query = f"""
+                SELECT {select_list(TimeSlot)}
                 FROM tbl_time_slot 
                 WHERE ts_duration = %s
             """
             self.cursor.execute(time_query, (duration,))
-            time_slots = self.cursor.fetchall()
+            time_slots = rows_as(TimeSlot, self.cursor)
             
             # Get all days that match our requirements
-            day_query = "SELECT ds_abbr FROM tbl_day_slot WHERE ds_day_type = %s"
+            day_query = f"SELECT {select_list(DayPattern)} FROM tbl_day_slot WHERE ds_day_type = %s"
             self.cursor.execute(day_query, (day_type,))
-            days = [row['ds_abbr'] for row in self.cursor.fetchall()]
+            days = [pattern.abbr for pattern in rows_as(DayPattern, self.cursor)]
             
             # Generate all possible combinations
+            specific_codes = {room.room_code for room in program_specific_rooms}
             available_slots = []
             for room in sorted_rooms:
                 for day in days:
                     for time_slot in time_slots:
-                        available_slots.append({
-                            'rdta_room_code': room['rd_room_code'],
-                            'rdta_day_abbr': day,
-                            'rdta_start_time': time_slot['ts_start_time'],
-                            'rdta_end_time': time_slot['ts_end_time'],
-                            'rdta_room_capacity': room['rd_capacity'],
-                            'rdta_day_type': day_type,
-                            'rdta_room_type': room['rd_type'],
-                            'rdta_room_function': room['rd_function'],
-                            'rdta_ts_duration': time_slot['ts_duration'],
-                            'rdta_room_size': room['rd_size'],
-                            'rdta_is_program_specific': room in program_specific_rooms  # Flag for debugging
-                        })
+                        available_slots.append(Assignment(
+                            room.room_code, day, time_slot.start_time, time_slot.end_time,
+                            room.capacity, day_type, room.room_type, room.function,
+                            time_slot.duration, room.size,
+                            room.room_code in specific_codes  # Flag for debugging
+                        ))
             
             return available_slots
         except Error as e:
@@ -301,24 +307,16 @@ class CourseScheduler:
             return []
     
     def time_to_minutes(self, time_str):
-        """Convert time string (e.g., '8:00 AM') to minutes since midnight"""
-        time_obj = datetime.strptime(time_str, '%I:%M %p').time()
+        """Convert time string (e.g., '8:00 AM', or '08:00' as the importer stores it) to minutes since midnight"""
+        try:
+            time_obj = datetime.strptime(time_str, '%I:%M %p').time()
+        except ValueError:
+            time_obj = datetime.strptime(time_str, '%H:%M').time()
         return time_obj.hour * 60 + time_obj.minute
     
     def parse_day_abbr(self, day_abbr):
         """Parse day abbreviation to return list of individual days"""
-        day_mapping = {
-            'M': ['Monday'],
-            'T': ['Tuesday'],
-            'W': ['Wednesday'],
-            'Th': ['Thursday'],
-            'F': ['Friday'],
-            'S': ['Saturday'],
-            'MTh': ['Monday', 'Thursday'],
-            'TF': ['Tuesday', 'Friday'],
-            'WS': ['Wednesday', 'Saturday']
-        }
-        return day_mapping.get(day_abbr, [])
+        return DAY_MAPPING.get(day_abbr, [])
     
     def has_time_overlap(self, program_section, day_abbr, new_start, new_end):
         """Check if the new time overlaps with any existing assignment for this program section"""
@@ -347,7 +345,7 @@ class CourseScheduler:
         return False
     
     def violates_consecutive_limit(self, program_section, day_abbr, new_start, new_end):
-        """Check if adding this class would exceed the 170-minute consecutive limit"""
+        """Check if adding this class would exceed the consecutive-minutes limit"""
         new_start_min = self.time_to_minutes(new_start)
         new_end_min = self.time_to_minutes(new_end)
 
@@ -367,7 +365,7 @@ class CourseScheduler:
                 if overlaps or (0 <= gap_before < self.min_break_minutes) or (0 <= gap_after < self.min_break_minutes):
                     chain_minutes += (block_end - block_start)
 
-            if chain_minutes > 170:
+            if chain_minutes > self.max_consecutive_minutes:
                 return True
 
         return False
@@ -455,52 +453,51 @@ class CourseScheduler:
         """Assign a section to a room-day-time slot"""
         try:
             # Get program sections as a list
-            program_sections = section['cs_program_section']
+            program_sections = section.program_section
             
             # Check if assignment is valid
             if not self.is_assignment_valid(
-                room['rdta_room_code'], 
-                room['rdta_day_abbr'], 
-                room['rdta_start_time'], 
-                room['rdta_end_time'], 
-                section['cs_course_section'],
+                room.room_code, 
+                room.day_abbr, 
+                room.start_time, 
+                room.end_time, 
+                section.course_section,
                 program_sections,
-                room['rdta_room_size'],  # Add room size
-                section['cs_student_count'],  # Add student count
-                room.get('rdta_is_program_specific', False)  # Add program-specific flag
+                room.room_size,  # Add room size
+                section.student_count,  # Add student count
+                room.is_program_specific  # Add program-specific flag
             ):
                 return False
             
             # Record the initial assignment
             if not self.record_initial_assignment(
-                section['cs_course_section'],
-                room['rdta_room_code'],
-                room['rdta_day_abbr'],
-                room['rdta_start_time'],
-                room['rdta_end_time']
+                section.course_section,
+                room.room_code,
+                room.day_abbr,
+                room.start_time,
+                room.end_time
             ):
                 return False
             
             # Create the final timeslot string by concatenating start and end times
-            final_timeslot = f"{room['rdta_start_time']} - {room['rdta_end_time']}"
+            final_timeslot = f"{room.start_time} - {room.end_time}"
             
             # Insert the final assignment with the concatenated timeslot
-            insert_query = """
+            insert_query = f"""
                 INSERT INTO tbl_final_assignment 
-                (fa_course_section, fa_program_section, fa_student_count, 
-                 fa_department, fa_room_code, fa_day_abbr, fa_start_time, fa_end_time, fa_course_year, fa_final_timeslot)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ({select_list(FinalAssignment)})
+                VALUES ({', '.join(['%s'] * len(FinalAssignment.COLUMNS))})
             """
-            values = (
-                section['cs_course_section'],
+            values = FinalAssignment(
+                section.course_section,
                 program_sections,
-                section['cs_student_count'],
-                section['cs_department'],
-                room['rdta_room_code'],
-                room['rdta_day_abbr'],
-                room['rdta_start_time'],
-                room['rdta_end_time'],
-                section['cs_course_year'],
+                section.student_count,
+                section.department,
+                room.room_code,
+                room.day_abbr,
+                room.start_time,
+                room.end_time,
+                section.course_year,
                 final_timeslot  # Add the concatenated timeslot
             )
             
@@ -508,29 +505,29 @@ class CourseScheduler:
             self.connection.commit()
             
             # Update tracking sets
-            self.room_assignments[(room['rdta_room_code'], room['rdta_day_abbr'], room['rdta_start_time'], room['rdta_end_time'])].add(section['cs_course_section'])
-            self.section_assignments.add(section['cs_course_section'])
+            self.room_assignments[(room.room_code, room.day_abbr, room.start_time, room.end_time)].add(section.course_section)
+            self.section_assignments.add(section.course_section)
             
             # Track program sections and their time slots
             for program_section in program_sections.split(', '):
                 program_section = program_section.strip()
                 if program_section:
                     self.program_section_assignments[program_section].append((
-                        room['rdta_day_abbr'],
-                        room['rdta_start_time'],
-                        room['rdta_end_time']
+                        room.day_abbr,
+                        room.start_time,
+                        room.end_time
                     ))
                     
                     # Update time blocks to track consecutive classes
                     self.update_time_blocks(
                         program_section,
-                        room['rdta_day_abbr'],
-                        room['rdta_start_time'],
-                        room['rdta_end_time']
+                        room.day_abbr,
+                        room.start_time,
+                        room.end_time
                     )
             
-            room_type = "PROGRAM-SPECIFIC" if room.get('rdta_is_program_specific') else "GENERAL"
-            print(f"Assigned {section['cs_course_section']} ({section['cs_course_type']}) to {room['rdta_room_code']} ({room_type}) on {room['rdta_day_abbr']} at {final_timeslot}")
+            room_type = "PROGRAM-SPECIFIC" if room.is_program_specific else "GENERAL"
+            print(f"Assigned {section.course_section} ({section.course_type}) to {room.room_code} ({room_type}) on {room.day_abbr} at {final_timeslot}")
             return True
         except Error as e:
             print(f"Error assigning section: {e}")
@@ -540,58 +537,87 @@ class CourseScheduler:
     def schedule_courses(self):
         """Main scheduling function"""
         self.connect()
-        self.clear_existing_assignments()
+        try:
+            self.clear_existing_assignments()
         
-        # Get all course sections that need scheduling
-        course_sections = self.query_course_sections()
+            # Get all course sections that need scheduling
+            course_sections = self.query_course_sections()
         
-        if not course_sections:
-            print("No course sections found to schedule")
-            return
+            if not course_sections:
+                print("No course sections found to schedule")
+                return
         
-        # Schedule each course section
-        for section in course_sections:
-            # Get available rooms for this section type
-            available_rooms = self.query_available_rooms(
-                section['cs_course_type'], 
-                section['cs_student_count'],
-                section.get('cs_department'),
-                section.get('cs_units'),
-                section.get('cs_program_section')
-            )
+            # Progress counters published to the event bus
+            total = len(course_sections)
+            placed = failed = 0
+            started = last_published = monotonic()
+        
+            # Schedule each course section
+            for index, section in enumerate(course_sections, start=1):
+                # Stop between sections when the run was cancelled
+                if self.cancel_token is not None:
+                    self.cancel_token.check()
             
-            if not available_rooms:
-                print(f"No available rooms found for {section['cs_course_section']} ({section['cs_course_type']})")
-                continue
+                now = monotonic()
+                if now - last_published >= PROGRESS_INTERVAL:
+                    last_published = now
+                    bus.publish("progress", {
+                        'total': total, 'processed': index - 1,
+                        'placed': placed, 'failed': failed,
+                        'current_section': section.course_section,
+                        'elapsed_seconds': round(now - started, 2)
+                    })
+        
+                # Get available rooms for this section type
+                available_rooms = self.query_available_rooms(
+                    section.course_type, 
+                    section.student_count,
+                    section.department,
+                    section.units,
+                    section.program_section
+                )
+            
+                if not available_rooms:
+                    print(f"No available rooms found for {section.course_section} ({section.course_type})")
+                    failed += 1
+                    metrics.scheduler_sections.inc(outcome='failed')
+                    continue
             
-            # Debug: Show available rooms
-            print(f"Available rooms for {section['cs_course_section']} ({section['cs_student_count']} students, {section['cs_program_section']}):")
-            for i, room in enumerate(available_rooms[:8]):  # Show first 8 options
-                room_type = "PROGRAM-SPECIFIC" if room.get('rdta_is_program_specific') else "GENERAL"
-                print(f"  {i+1}. {room['rdta_room_code']} (size: {room['rdta_room_size']}, cap: {room['rdta_room_capacity']}, type: {room_type})")
+                # Debug: Show available rooms
+                print(f"Available rooms for {section.course_section} ({section.student_count} students, {section.program_section}):")
+                for i, room in enumerate(available_rooms[:8]):  # Show first 8 options
+                    room_type = "PROGRAM-SPECIFIC" if room.is_program_specific else "GENERAL"
+                    print(f"  {i+1}. {room.room_code} (size: {room.room_size}, cap: {room.room_capacity}, type: {room_type})")
             
-            # Try to assign to available rooms in order
-            assigned = False
-            for room in available_rooms:
-                if self.assign_section(section, room):
-                    assigned = True
-                    break
+                # Try to assign to available rooms in order
+                assigned = False
+                candidates = 0
+                for room in available_rooms:
+                    candidates += 1
+                    if self.assign_section(section, room):
+                        assigned = True
+                        break
+                metrics.scheduler_candidates.inc(candidates)
             
-            if not assigned:
-                print(f"Failed to assign {section['cs_course_section']} ({section['cs_course_type']}) - no valid slots available")
+                if assigned:
+                    placed += 1
+                    metrics.scheduler_sections.inc(outcome='placed')
+                else:
+                    failed += 1
+                    metrics.scheduler_sections.inc(outcome='failed')
+                    print(f"Failed to assign {section.course_section} ({section.course_type}) - no valid slots available")
         
-        self.disconnect()
-        print("Scheduling completed")
-
-# Database configuration
-db_config = {
-    'host': os.getenv("MYSQLHOST", "localhost"),
-    'user': os.getenv("MYSQLUSER", "root"),
-    'password': os.getenv("MYSQLPASSWORD", ""),
-    'database': os.getenv("MYSQLDATABASE", "schedopt_db"),
-    'port': int(os.getenv("MYSQLPORT", 3306))
-}
+            bus.publish("progress", {
+                'total': total, 'processed': total,
+                'placed': placed, 'failed': failed,
+                'current_section': None,
+                'elapsed_seconds': round(monotonic() - started, 2)
+            })
+            print("Scheduling completed")
+        finally:
+            self.disconnect()
 
-# Run the scheduler
-scheduler = CourseScheduler(db_config)
-scheduler.schedule_courses()
\ No newline at end of file
+if __name__ == "__main__":
+    # Run the scheduler
+    scheduler = CourseScheduler()
+    scheduler.schedule_courses()
\ No newline at end of file
@@ -0,0 +1,200 @@
+import io
+import time
+import zipfile
+
+from flask import Blueprint, request, jsonify
+
+from db import get_connection
+from import_schema import (TEMPLATES, UploadError, MAX_UPLOAD_BYTES, read_upload, open_workbook,
+                           parse_workbook, parse_sheet, template_for)
+from readiness import invalidate
+import change_log
+from save_scripts import (TABLE_LOADS, DIFF_ACTIONS, row_params, diff_rows, diff_size, patchable, change_entries,
+                          apply_diff, load_table, load_report, loaded, swap_tables, drop_shadows, record_swapped)
+from validation import check, references_from
+
+bundle_bp = Blueprint('bundle_bp', __name__)
+
+# Refuse archives that expand far beyond the upload limit
+MAX_BUNDLE_EXPANDED_BYTES = 10 * MAX_UPLOAD_BYTES
+
+
+def split_bundle(data):
+    """Template -> (source name, workbook bytes or None, sheet name or None) for a zip of
+    workbooks or one multi-sheet workbook, and that workbook opened once (None for a zip).
+
+    Sheets of the multi-sheet workbook carry None as their bytes; the caller
+    closes the returned workbook.
+    """
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile:
+        raise UploadError("Expected a .zip of the import templates or an .xlsx workbook")
+
+    workbook = None
+    with archive:
+        names = archive.namelist()
+        # An .xlsx is itself a zip; its sheets carry the templates
+        if "[Content_Types].xml" in names:
+            workbook = open_workbook(data)
+            members = [(sheet, None, sheet) for sheet in workbook.sheetnames]
+        else:
+            infos = [info for info in archive.infolist()
+                     if info.filename.lower().endswith(".xlsx") and not info.filename.startswith("__MACOSX")]
+            if sum(info.file_size for info in infos) > MAX_BUNDLE_EXPANDED_BYTES:
+                raise UploadError("Bundle expands beyond the upload limit", status=413)
+            members = [(info.filename, archive.read(info), None) for info in infos]
+
+    parts, unknown = {}, []
+    for name, content, sheet in members:
+        template = template_for(name.rsplit("/", 1)[-1])
+        if template is None or template in parts:
+            unknown.append(name)
+            continue
+        parts[template] = (name, content, sheet)
+    missing = [template for template in TEMPLATES if template not in parts]
+    if missing:
+        if workbook is not None:
+            workbook.close()
+        raise UploadError(f"Bundle is missing: {', '.join(missing)}",
+                          details=[f"Unrecognised: {name}" for name in unknown])
+    return parts, workbook
+
+
+def parse_part(workbook, template, content, sheet):
+    started = time.monotonic()
+    row_numbers = []
+    try:
+        if content is None:
+            rows = parse_sheet(workbook, template, sheet, row_numbers)
+        else:
+            rows = parse_workbook(content, template, sheet, row_numbers)
+        return rows, row_numbers, None, time.monotonic() - started
+    except UploadError as e:
+        return None, None, e, time.monotonic() - started
+
+
+# --- Import all six templates in one request ---
+@bundle_bp.route('/import_bundle', methods=['POST'])
+def import_bundle():
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file uploaded in request'}), 400
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+
+    try:
+        parts, workbook = split_bundle(read_upload(file))
+    except UploadError as e:
+        body = {'error': str(e)}
+        if e.details:
+            body['details'] = e.details
+        return jsonify(body), e.status
+
+    # Parsing is CPU bound openpyxl work, so the sheets are read in turn
+    report, records, row_numbers = {}, {}, {}
+    try:
+        for template, (name, content, sheet) in parts.items():
+            rows, numbers, error, seconds = parse_part(workbook, template, content, sheet)
+            report[template] = {'source': name, 'parse_seconds': round(seconds, 4)}
+            if error is not None:
+                report[template]['error'] = str(error)
+                report[template]['details'] = error.details
+            else:
+                report[template]['rows'] = len(rows)
+                records[template], row_numbers[template] = rows, numbers
+    finally:
+        if workbook is not None:
+            workbook.close()
+
+    # Foreign keys point at the sheets of this bundle, not the saved tables
+    references = references_from(records)
+    for template in list(records):
+        started = time.monotonic()
+        try:
+            check(template, records[template], references, row_numbers[template])
+        except UploadError as e:
+            report[template]['error'] = str(e)
+            report[template]['details'] = e.details
+            del records[template]
+        report[template]['validate_seconds'] = round(time.monotonic() - started, 4)
+
+    if len(records) < len(parts):
+        return jsonify({'success': False, 'error': 'Some sheets are invalid; nothing was saved',
+                        'sheets': report}), 400
+
+    # Unchanged tables are left alone and small diffs are applied in place. The
+    # rest are loaded into shadows and swapped in together, so a failure up to
+    # the swap leaves the old data in place.
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    loads, patches, stats, changes = [], {}, {}, {}
+    try:
+        try:
+            change_log.ensure_change_schema()
+            for template in TEMPLATES:
+                started = time.monotonic()
+                table = TABLE_LOADS[template][0]
+                params = [row_params(template, row) for row in records[template]]
+                diff = diff_rows(cursor, template, params)
+                changes[table] = change_entries(template, diff)
+                if patchable(diff, len(params)):
+                    patches[template] = diff
+                    stats[template] = {'rows': len(params), 'seconds': time.monotonic() - started,
+                                       'method': "diff" if diff_size(diff) else "unchanged"}
+                else:
+                    stats[template] = load_table(cursor, template, params)
+                    loads.append(stats[template])
+                if diff is not None:
+                    stats[template].update({action: len(diff[action]) for action in DIFF_ACTIONS})
+            conn.commit()
+            if loads:
+                swap_tables(cursor, loads)
+        except Exception as e:
+            conn.rollback()
+            drop_shadows(cursor, loads)
+            for table, _ in TABLE_LOADS.values():
+                invalidate(table)
+            print(f"Error importing bundle: {str(e)}")
+            return jsonify({'success': False, 'error': str(e), 'sheets': report}), 500
+
+        # RENAME TABLE commits implicitly, so the in-place changes follow the swap
+        swapped = [template for template in TEMPLATES if template not in patches]
+        try:
+            for template, diff in patches.items():
+                started = time.monotonic()
+                apply_diff(cursor, template, diff)
+                stats[template]['seconds'] += time.monotonic() - started
+            version = change_log.record_changes(cursor, changes)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            for table, _ in TABLE_LOADS.values():
+                invalidate(table)
+            print(f"Error importing bundle: {str(e)}")
+            if not swapped:
+                return jsonify({'success': False, 'error': str(e), 'sheets': report}), 500
+            # The swapped tables are live and can't be put back
+            record_swapped(conn, cursor, {TABLE_LOADS[template][0]: changes[TABLE_LOADS[template][0]]
+                                          for template in swapped})
+            return jsonify({'success': False, 'sheets': report,
+                            'error': f"Replaced {', '.join(swapped)}, but the changes to the other "
+                                     f"sheets were not saved: {str(e)}"}), 500
+    finally:
+        cursor.close(); conn.close()
+
+    # Everything is committed now, so what follows can't fail the import
+    for template in TEMPLATES:
+        report[template].update(load_report(dict(stats[template], data_version=version)))
+    try:
+        loaded(list(TEMPLATES))
+    except Exception as e:
+        for table, _ in TABLE_LOADS.values():
+            invalidate(table)
+        print(f"Warning: bundle imported but caches were not refreshed: {str(e)}")
+        return jsonify({'success': True, 'sheets': report, 'warning': str(e)})
+    return jsonify({'success': True, 'sheets': report})
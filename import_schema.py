@@ -0,0 +1,169 @@
+import io
+import os
+from datetime import datetime, time, timedelta
+
+# Largest accepted upload; bigger files are rejected before parsing
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 10 * 1024 * 1024))
+
+# Parse errors reported back per upload (the rest are counted)
+MAX_REPORTED_ERRORS = 20
+
+
+class UploadError(ValueError):
+    """Upload that can't be accepted; status is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400, details=None):
+        super().__init__(message)
+        self.status = status
+        self.details = details or []
+
+
+def text(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+
+def integer(value):
+    if isinstance(value, bool):
+        raise ValueError(f"expected a whole number, got {value!r}")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+        return int(value.strip())
+    raise ValueError(f"expected a whole number, got {value!r}")
+
+
+def clock(value):
+    """Time of day as 'HH:MM'"""
+    if isinstance(value, (time, datetime)):
+        return value.strftime("%H:%M")
+    if isinstance(value, timedelta):
+        hours, minutes = divmod(int(value.total_seconds() // 60), 60)
+        return f"{hours:02d}:{minutes:02d}"
+    if isinstance(value, str):
+        for fmt in ("%H:%M", "%H:%M:%S", "%I:%M %p"):
+            try:
+                return datetime.strptime(value.strip(), fmt).strftime("%H:%M")
+            except ValueError:
+                continue
+    raise ValueError(f"expected a time of day, got {value!r}")
+
+
+# Columns of every import template and how their cells are parsed
+TEMPLATES = {
+    "forecasted": [
+        ("PROGRAM", text), ("DEPARTMENT", text), ("YEAR", integer), ("ENROLLED COUNT", integer)
+    ],
+    "programs": [
+        ("PROGRAM ABBREVIATION", text), ("PROGRAM NAME", text), ("DEPARTMENT", text),
+        ("PRIORITY INDEX", integer)
+    ],
+    "prospectus": [
+        ("PROGRAM ABBREVIATION", text), ("DEPARTMENT", text), ("YEAR", integer), ("COURSE CODE", text),
+        ("COURSE TITLE", text), ("UNITS", integer), ("SEMESTER", integer), ("TYPE", text)
+    ],
+    "rooms": [
+        ("ROOM CODE", text), ("BUILDING", text), ("CAPACITY", integer), ("SIZE", text), ("TYPE", text),
+        ("FUNCTION", text), ("DEPARTMENT OWNER", text), ("PROGRAM OWNER", text)
+    ],
+    "timeslots": [
+        ("KEY", integer), ("START TIME", clock), ("END TIME", clock), ("DURATION", integer)
+    ],
+    "days": [
+        ("KEY", integer), ("DAY ABBREVIATION", text), ("DAY LONG", text), ("DAY TYPE", text)
+    ],
+}
+
+
+def read_upload(file):
+    """Bytes of an uploaded file, refusing anything over MAX_UPLOAD_BYTES"""
+    data = file.stream.read(MAX_UPLOAD_BYTES + 1)
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise UploadError(f"File is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB", status=413)
+    return data
+
+
+def parse_rows(rows, template, row_numbers=None):
+    """Typed records from an iterator of row tuples whose first row is the header.
+
+    The sheet row of each record is appended to row_numbers when given.
+    """
+    columns = TEMPLATES[template]
+    header = next(rows, None) or ()
+    positions = {str(name).strip(): index for index, name in enumerate(header) if name is not None}
+    missing = [name for name, _ in columns if name not in positions]
+    if missing:
+        raise UploadError(f"Excel missing required columns: {', '.join(missing)}")
+
+    records, errors = [], []
+    for row_number, row in enumerate(rows, start=2):
+        if all(value is None or (isinstance(value, str) and not value.strip()) for value in row):
+            continue
+        record = {}
+        for name, parse in columns:
+            index = positions[name]
+            value = row[index] if index < len(row) else None
+            if value is None or (isinstance(value, str) and not value.strip()):
+                record[name] = None
+                continue
+            try:
+                record[name] = parse(value)
+            except ValueError as e:
+                errors.append(f"Row {row_number}, {name}: {e}")
+        records.append(record)
+        if row_numbers is not None:
+            row_numbers.append(row_number)
+
+    if errors:
+        shown = errors[:MAX_REPORTED_ERRORS]
+        if len(errors) > len(shown):
+            shown.append(f"... and {len(errors) - len(shown)} more")
+        raise UploadError(f"{len(errors)} invalid cell(s) in the upload", details=shown)
+    return records
+
+
+def open_workbook(data):
+    """Read-only openpyxl workbook of an .xlsx held in memory (the caller closes it)"""
+    from openpyxl import load_workbook
+
+    try:
+        return load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    except Exception as e:
+        raise UploadError(f"Failed to read Excel file: {str(e)}")
+
+
+def parse_sheet(wb, template, sheet=None, row_numbers=None):
+    """Typed records from one sheet (the first by default) of an open workbook"""
+    ws = wb[sheet] if sheet is not None else wb.worksheets[0]
+    return parse_rows(ws.iter_rows(values_only=True), template, row_numbers)
+
+
+def parse_workbook(data, template, sheet=None, row_numbers=None):
+    """Typed records from one sheet (the first by default) of an .xlsx held in memory"""
+    wb = open_workbook(data)
+    try:
+        return parse_sheet(wb, template, sheet, row_numbers)
+    finally:
+        wb.close()
+
+
+# Words that identify a template in a bundle member or sheet name
+TEMPLATE_KEYWORDS = {
+    "forecasted": "forecast",
+    "programs": "program",
+    "prospectus": "prospectus",
+    "rooms": "room",
+    "timeslots": "timeslot",
+    "days": "day",
+}
+
+
+def template_for(name):
+    """Template a file or sheet name such as 'Rooms Import (1).xlsx' belongs to, or None"""
+    name = name.lower().replace(" ", "")
+    matches = [template for template, keyword in TEMPLATE_KEYWORDS.items() if keyword in name]
+    return matches[0] if len(matches) == 1 else None
@@ -0,0 +1,117 @@
+from typing import NamedTuple
+
+# Light records for the pipeline stages, built straight from tuple cursors.
+# COLUMNS lists the table columns in field order, so a query selecting
+# them can be turned into records with rows_as().
+
+
+class ProgramSection(NamedTuple):
+    program_abbr: str
+    year_level: int
+    section_group: str
+    section_final: str
+    population: int
+    priority_index: int
+    department: str = None
+
+    COLUMNS = ("ps.ps_program_abbr", "ps.ps_year_level", "ps.ps_section_group",
+               "ps.ps_section_final", "ps.ps_section_population", "ps.ps_priority_index",
+               "pd.pd_department")
+
+
+class Course(NamedTuple):
+    program: str
+    department: str
+    year: int
+    course_code: str
+    course_title: str
+    units: int
+    semester: int
+    course_type: str
+
+    COLUMNS = ("pl_program", "pl_department", "pl_year", "pl_course_code",
+               "pl_course_title", "pl_units", "pl_semester", "pl_type")
+
+
+class CourseSection(NamedTuple):
+    course_section: str
+    program_section: str
+    student_count: int
+    department: str
+    course_type: str
+    semester: int
+    units: int
+    course_year: int
+
+    COLUMNS = ("cs_course_section", "cs_program_section", "cs_student_count", "cs_department",
+               "cs_course_type", "cs_semester", "cs_units", "cs_course_year")
+
+
+class Room(NamedTuple):
+    room_code: str
+    room_type: str
+    function: str
+    capacity: int
+    department_owner: str
+    program_owner: str
+    size: str
+
+    COLUMNS = ("rd_room_code", "rd_type", "rd_function", "rd_capacity",
+               "rd_department_owner", "rd_program_owner", "rd_size")
+
+
+class TimeSlot(NamedTuple):
+    start_time: str
+    end_time: str
+    duration: int
+
+    COLUMNS = ("ts_start_time", "ts_end_time", "ts_duration")
+
+
+class DayPattern(NamedTuple):
+    abbr: str
+    day_type: str
+
+    COLUMNS = ("ds_abbr", "ds_day_type")
+
+
+class Assignment(NamedTuple):
+    """Candidate room, day pattern and time slot for a course section"""
+    room_code: str
+    day_abbr: str
+    start_time: str
+    end_time: str
+    room_capacity: int
+    day_type: str
+    room_type: str
+    room_function: str
+    duration: int
+    room_size: str
+    is_program_specific: bool
+
+
+class FinalAssignment(NamedTuple):
+    course_section: str
+    program_section: str
+    student_count: int
+    department: str
+    room_code: str
+    day_abbr: str
+    start_time: str
+    end_time: str
+    course_year: int
+    final_timeslot: str
+
+    COLUMNS = ("fa_course_section", "fa_program_section", "fa_student_count", "fa_department",
+               "fa_room_code", "fa_day_abbr", "fa_start_time", "fa_end_time",
+               "fa_course_year", "fa_final_timeslot")
+
+
+def select_list(model):
+    """Column list of a SELECT matching the model's fields"""
+    return ", ".join(model.COLUMNS)
+
+
+def rows_as(model, cursor):
+    """Fetch the remaining rows of a tuple cursor as model records"""
+    return list(map(model._make, cursor.fetchall()))
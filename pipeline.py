@@ -0,0 +1,112 @@
+from section import section_students, MAX_PER_SECTION
+from course_section import create_course_sections, MAX_PER_COURSE_SECTION
+from final_assignment import CourseScheduler
+from progress import bus
+from singleflight import RunCancelled
+import metrics
+import result_cache
+import schedule_store
+import threading
+import time
+
+# Runs for different semesters still rewrite the same tables, so they queue
+_pipeline_lock = threading.Lock()
+
+
+class StageError(Exception):
+    """Raised when one of the scheduling stages fails"""
+
+    def __init__(self, stage, error):
+        super().__init__(f"Stage {stage} failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+def scheduler_options():
+    """Tunables that change the outcome of a run (part of the input fingerprint)"""
+    scheduler = CourseScheduler()
+    return {
+        "max_per_section": MAX_PER_SECTION,
+        "max_per_course_section": MAX_PER_COURSE_SECTION,
+        "min_break_minutes": scheduler.min_break_minutes,
+        "max_consecutive_minutes": scheduler.max_consecutive_minutes
+    }
+
+
+def run_pipeline(semester, force=False, cancel_token=None):
+    """Run sectioning, course sectioning and room assignment in-process.
+
+    Every stage borrows its connections from the shared pool, so a run
+    no longer pays a process start-up and MySQL handshake per script.
+    When the inputs match an earlier run the cached result is restored
+    instead, unless force is set. A cancel_token is checked between
+    stages and between sections. Returns a summary of the run.
+    """
+    with _pipeline_lock:
+        return _run_stages(semester, force, cancel_token)
+
+
+def _run_stages(semester, force, cancel_token):
+    started = time.monotonic()
+    schedule_changed = False
+    bus.start_run(semester=semester)
+    try:
+        if cancel_token is not None:
+            cancel_token.check()
+        bus.publish("stage", {"stage": "fingerprint", "status": "started"})
+        stage_started = time.monotonic()
+        fingerprint, result_checksums = result_cache.fingerprint_inputs(semester, scheduler_options())
+        metrics.stage_duration.observe(time.monotonic() - stage_started, stage="fingerprint")
+
+        stage_started = time.monotonic()
+        restored = None if force else result_cache.restore(fingerprint, result_checksums)
+        if restored:
+            schedule_changed = restored == "restored"
+            metrics.stage_duration.observe(time.monotonic() - stage_started, stage="restore")
+            summary = {"cache_hit": True, "fingerprint": fingerprint}
+            bus.publish("done", {**summary, "elapsed_seconds": round(time.monotonic() - started, 2)})
+            return summary
+
+        stages = [
+            ("section", section_students),
+            ("course_section", lambda: create_course_sections(semester)),
+            ("final_assignment", lambda: CourseScheduler(cancel_token).schedule_courses()),
+        ]
+
+        for name, stage in stages:
+            if cancel_token is not None:
+                cancel_token.check()
+            bus.publish("stage", {"stage": name, "status": "started"})
+            if name == "final_assignment":
+                schedule_changed = True
+            stage_started = time.monotonic()
+            try:
+                stage()
+            except RunCancelled:
+                raise
+            except Exception as e:
+                raise StageError(name, e) from e
+            finally:
+                metrics.stage_duration.observe(time.monotonic() - stage_started, stage=name)
+            bus.publish("stage", {"stage": name, "status": "finished"})
+
+        stage_started = time.monotonic()
+        result_cache.store(fingerprint)
+        metrics.stage_duration.observe(time.monotonic() - stage_started, stage="store")
+    except RunCancelled as e:
+        bus.publish("cancelled", {"message": str(e), "elapsed_seconds": round(time.monotonic() - started, 2)})
+        raise
+    except Exception as e:
+        bus.publish("error", {"message": str(e), "elapsed_seconds": round(time.monotonic() - started, 2)})
+        raise
+    finally:
+        # Even a failed or cancelled run may have rewritten tbl_final_assignment
+        if schedule_changed:
+            try:
+                schedule_store.publish_schedule()
+            except Exception as e:
+                print(f"Error publishing schedule version: {e}")
+
+    summary = {"cache_hit": False, "fingerprint": fingerprint}
+    bus.publish("done", {**summary, "elapsed_seconds": round(time.monotonic() - started, 2)})
+    return summary
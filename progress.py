@@ -0,0 +1,107 @@
+import itertools
+import json
+import queue
+import threading
+import time
+
+# Minimum seconds between two progress events from the scheduler loop
+PROGRESS_INTERVAL = 0.5
+
+TERMINAL_EVENTS = ("done", "error", "cancelled")
+
+
+class EventBus:
+    """In-process fan-out of scheduling events to server-sent-event streams.
+
+    Publishing only takes a lock and updates the latest snapshot when
+    nobody is listening, so the scheduler can call it from its hot loop.
+    """
+
+    def __init__(self, max_queue=256):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._max_queue = max_queue
+        self._run_ids = itertools.count(1)
+        self._snapshot = {"run_id": None, "status": "idle"}
+
+    def start_run(self, **info):
+        """Begin a new run; later events are tagged with its id"""
+        with self._lock:
+            run_id = next(self._run_ids)
+            self._snapshot = {"run_id": run_id, "status": "running",
+                              "started_at": time.time(), **info}
+        self.publish("run", dict(info))
+        return run_id
+
+    def publish(self, event, data):
+        with self._lock:
+            run_id = self._snapshot["run_id"]
+            if event == "stage":
+                self._snapshot["stage"] = data.get("stage")
+            elif event == "progress":
+                self._snapshot["progress"] = data
+            elif event in TERMINAL_EVENTS:
+                self._snapshot["status"] = event
+                self._snapshot["result"] = data
+            if not self._subscribers:
+                return
+            message = {"event": event, "run_id": run_id, "data": data}
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Slow reader: drop its oldest event rather than block the scheduler
+                try:
+                    subscriber.get_nowait()
+                    subscriber.put_nowait(message)
+                except (queue.Empty, queue.Full):
+                    pass
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self._max_queue)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._snapshot)
+
+
+bus = EventBus()
+
+
+def format_sse(event, data, event_id=None):
+    """Encode one server-sent event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def stream_events(heartbeat=15):
+    """Yield server-sent events until the current (or next) run finishes"""
+    subscriber = bus.subscribe()
+    try:
+        yield "retry: 3000\n\n"
+        snapshot = bus.snapshot()
+        yield format_sse("snapshot", snapshot, snapshot["run_id"])
+        while True:
+            try:
+                message = subscriber.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(message["event"], message["data"], message["run_id"])
+            if message["event"] in TERMINAL_EVENTS:
+                break
+    finally:
+        bus.unsubscribe(subscriber)
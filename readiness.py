@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+
+from db import get_connection
+
+# Source tables the scheduler needs, in the order the UI checks them
+TABLE_MAP = {
+    "Forecasting": "tbl_forecasted_enrolled",
+    "Programs": "tbl_program_department",
+    "Prospectus": "tbl_prospectus_list",
+    "Rooms": "tbl_room_data",
+    "Timeslots": "tbl_time_slot",
+    "Days": "tbl_day_slot"
+}
+
+# Re-verify cached entries after this many seconds, in case a table was
+# changed outside the save endpoints (another worker, manual SQL). Only
+# tables found ready are cached; empty ones are probed on every check, so
+# a save handled by another worker is seen straight away.
+READINESS_TTL = float(os.getenv("READINESS_TTL", 300))
+
+_lock = threading.Lock()
+_status = {}        # table -> checked_at, for tables known to hold rows
+_generation = {}    # table -> bumped on every mark/invalidate
+
+
+def _verify(tables):
+    """Probe several tables for at least one row in a single round trip"""
+    probes = ", ".join(f"EXISTS(SELECT 1 FROM {table})" for table in tables)
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT {probes}")
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+    return {table: bool(value) for table, value in zip(tables, row)}
+
+
+def check_all_tables():
+    """Report per-table readiness, answering from memory when the cache is warm"""
+    now = time.monotonic()
+    with _lock:
+        stale = [table for table in TABLE_MAP.values()
+                 if table not in _status or now - _status[table] > READINESS_TTL]
+        generations = {table: _generation.get(table, 0) for table in stale}
+
+    fresh = _verify(stale) if stale else {}
+    with _lock:
+        for table, is_ready in fresh.items():
+            # A save that landed while we were probing wins over our result
+            if _generation.get(table, 0) != generations[table]:
+                continue
+            if is_ready:
+                _status[table] = now
+            else:
+                _status.pop(table, None)
+
+        results = {}
+        for name, table in TABLE_MAP.items():
+            is_ready = table in _status or fresh.get(table, False)
+            results[name] = "success" if is_ready else "failed"
+            if results[name] == "failed":
+                break   # stop at first failure
+    return results
+
+
+def mark_table(table, is_ready):
+    """Record a table's state after a save rewrote it"""
+    with _lock:
+        _generation[table] = _generation.get(table, 0) + 1
+        if is_ready:
+            _status[table] = time.monotonic()
+        else:
+            _status.pop(table, None)
+
+
+def invalidate(table=None):
+    """Forget cached state for one table, or for all of them"""
+    with _lock:
+        tables = [table] if table else list(TABLE_MAP.values())
+        for name in tables:
+            _generation[name] = _generation.get(name, 0) + 1
+            _status.pop(name, None)
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from db import get_connection
+from readiness import TABLE_MAP
+
+# Inputs that decide the outcome of a scheduling run
+SOURCE_TABLES = list(TABLE_MAP.values())
+
+# Tables the pipeline writes, with the columns needed to put a result back
+RESULT_TABLES = {
+    "tbl_program_sections": [
+        "ps_program_abbr", "ps_year_level", "ps_section_group",
+        "ps_section_final", "ps_section_population", "ps_priority_index"
+    ],
+    "tbl_course_section": [
+        "cs_course_section", "cs_program_section", "cs_student_count", "cs_department",
+        "cs_course_type", "cs_semester", "cs_units", "cs_course_year"
+    ],
+    "tbl_initial_assignments": [
+        "ia_course_section", "ia_room_code", "ia_day_abbr", "ia_start_time", "ia_end_time"
+    ],
+    "tbl_final_assignment": [
+        "fa_course_section", "fa_program_section", "fa_student_count", "fa_department",
+        "fa_room_code", "fa_day_abbr", "fa_start_time", "fa_end_time",
+        "fa_course_year", "fa_final_timeslot"
+    ],
+}
+
+# Number of distinct results kept in memory (least recently used is dropped)
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", 4))
+
+_lock = threading.Lock()
+_results = OrderedDict()    # fingerprint -> {'rows': {table: [...]}, 'checksums': {...}}
+
+
+def table_checksums(tables):
+    """Content checksums for several tables in one round trip"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("CHECKSUM TABLE " + ", ".join(tables))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+    # MySQL reports tables as "<database>.<table>"
+    return {name.split(".")[-1]: checksum for name, checksum in rows}
+
+
+def fingerprint_inputs(semester, options):
+    """Hash the source tables, semester and scheduler options of a run.
+
+    Returns the fingerprint and the current checksums of the result
+    tables, so a hit can tell whether the tables already hold the result.
+    """
+    checksums = table_checksums(SOURCE_TABLES + list(RESULT_TABLES))
+    payload = json.dumps({
+        "tables": {table: checksums.get(table) for table in SOURCE_TABLES},
+        "semester": semester,
+        "options": options
+    }, sort_keys=True, default=str)
+    fingerprint = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return fingerprint, {table: checksums.get(table) for table in RESULT_TABLES}
+
+
+def store(fingerprint):
+    """Snapshot the result tables after a successful run"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        rows = {}
+        for table, columns in RESULT_TABLES.items():
+            cursor.execute(f"SELECT {', '.join(columns)} FROM {table}")
+            rows[table] = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    entry = {"rows": rows, "checksums": table_checksums(list(RESULT_TABLES))}
+    with _lock:
+        _results[fingerprint] = entry
+        _results.move_to_end(fingerprint)
+        while len(_results) > RESULT_CACHE_SIZE:
+            _results.popitem(last=False)
+
+
+def restore(fingerprint, current_checksums):
+    """Put a cached result back in place.
+
+    Returns None on a cache miss, "current" when the tables already hold
+    the result and "restored" when the rows were written back.
+    """
+    with _lock:
+        entry = _results.get(fingerprint)
+        if entry is None:
+            return None
+        _results.move_to_end(fingerprint)
+
+    # The tables may still hold this exact result from the previous run
+    if entry["checksums"] == current_checksums:
+        return "current"
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        for table, columns in RESULT_TABLES.items():
+            cursor.execute(f"DELETE FROM {table}")
+            if entry["rows"][table]:
+                placeholders = ", ".join(["%s"] * len(columns))
+                cursor.executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                    entry["rows"][table]
+                )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    entry["checksums"] = table_checksums(list(RESULT_TABLES))
+    return "restored"
+
+
+def clear():
+    """Drop every cached result"""
+    with _lock:
+        _results.clear()
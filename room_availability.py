@@ -0,0 +1,223 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from flask import Blueprint, jsonify, request
+
+from db import get_connection
+from final_assignment import DAY_MAPPING
+from schedule_store import get_schedule_version
+
+rooms_bp = Blueprint('rooms_bp', __name__)
+
+DEFAULT_DURATION = 80
+DEFAULT_LIMIT = 200
+MAX_LIMIT = 2000
+
+
+def to_minutes(value):
+    """Minutes since midnight for TIME columns, time objects and '8:00 AM' / '08:00' strings"""
+    if isinstance(value, timedelta):
+        return int(value.total_seconds() // 60)
+    if isinstance(value, time):
+        return value.hour * 60 + value.minute
+    text = str(value).strip()
+    for fmt in ('%I:%M %p', '%H:%M', '%H:%M:%S'):
+        try:
+            parsed = datetime.strptime(text, fmt)
+            return parsed.hour * 60 + parsed.minute
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised time: {value}")
+
+
+class Timeline:
+    """Sorted busy intervals of one room (or program section) on one day"""
+
+    def __init__(self, intervals):
+        intervals = sorted(intervals)
+        self.starts = [start for start, _ in intervals]
+        # Running maximum of end times, so overlapping inputs are still safe
+        self.max_ends = []
+        running = -1
+        for _, end in intervals:
+            running = max(running, end)
+            self.max_ends.append(running)
+
+    def is_free(self, start, end):
+        index = bisect_left(self.starts, end)
+        return index == 0 or self.max_ends[index - 1] <= start
+
+
+class AvailabilityIndex:
+    """Weekly occupancy of every room and program section for one schedule version"""
+
+    def __init__(self, version, rooms, time_slots, assignments):
+        self.version = version
+        self.rooms = rooms
+        self.time_slots = time_slots
+
+        room_busy = defaultdict(lambda: defaultdict(list))
+        section_busy = defaultdict(lambda: defaultdict(list))
+        for room_code, day_abbr, start_time, end_time, program_sections in assignments:
+            start, end = to_minutes(start_time), to_minutes(end_time)
+            for day in DAY_MAPPING.get(day_abbr, []):
+                room_busy[room_code][day].append((start, end))
+                for program_section in (program_sections or '').split(','):
+                    if program_section.strip():
+                        section_busy[program_section.strip()][day].append((start, end))
+
+        self.room_timelines = {
+            room: {day: Timeline(intervals) for day, intervals in days.items()}
+            for room, days in room_busy.items()
+        }
+        self.section_timelines = {
+            section: {day: Timeline(intervals) for day, intervals in days.items()}
+            for section, days in section_busy.items()
+        }
+
+    @classmethod
+    def load(cls, version):
+        conn = get_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("""
+                SELECT rd_room_code, rd_building, rd_capacity, rd_size, rd_type, rd_function,
+                       rd_department_owner, rd_program_owner
+                FROM tbl_room_data
+            """)
+            rooms = cursor.fetchall()
+
+            cursor.execute("SELECT ts_start_time, ts_end_time, ts_duration FROM tbl_time_slot")
+            time_slots = []
+            for slot in cursor.fetchall():
+                time_slots.append({
+                    'start_time': str(slot['ts_start_time']),
+                    'end_time': str(slot['ts_end_time']),
+                    'duration': slot['ts_duration'],
+                    'start': to_minutes(slot['ts_start_time']),
+                    'end': to_minutes(slot['ts_end_time'])
+                })
+            time_slots.sort(key=lambda slot: slot['start'])
+
+            cursor.execute("""
+                SELECT fa_room_code, fa_day_abbr, fa_start_time, fa_end_time, fa_program_section
+                FROM tbl_final_assignment
+            """)
+            assignments = [
+                (row['fa_room_code'], row['fa_day_abbr'], row['fa_start_time'],
+                 row['fa_end_time'], row['fa_program_section'])
+                for row in cursor.fetchall()
+            ]
+        finally:
+            cursor.close()
+            conn.close()
+        return cls(version, rooms, time_slots, assignments)
+
+    def _free(self, timelines, key, days, start, end):
+        by_day = timelines.get(key)
+        if not by_day:
+            return True
+        return all(day not in by_day or by_day[day].is_free(start, end) for day in days)
+
+    def search(self, capacity=0, room_type=None, room_function=None, duration=DEFAULT_DURATION,
+               day_patterns=None, program_sections=(), limit=DEFAULT_LIMIT):
+        """Free room/day-pattern/time-slot combinations, stopping after limit + 1 hits"""
+        rooms = [
+            room for room in self.rooms
+            if (room['rd_capacity'] or 0) >= capacity
+            and (not room_type or room['rd_type'] == room_type)
+            and (not room_function or room['rd_function'] == room_function)
+        ]
+        rooms.sort(key=lambda room: (room['rd_capacity'], room['rd_room_code']))
+        slots = [slot for slot in self.time_slots if slot['duration'] == duration]
+        patterns = day_patterns or list(DAY_MAPPING)
+
+        results = []
+        for room in rooms:
+            for pattern in patterns:
+                days = DAY_MAPPING[pattern]
+                for slot in slots:
+                    start, end = slot['start'], slot['end']
+                    if not self._free(self.room_timelines, room['rd_room_code'], days, start, end):
+                        continue
+                    if not all(self._free(self.section_timelines, section, days, start, end)
+                               for section in program_sections):
+                        continue
+                    results.append({
+                        'room': room['rd_room_code'],
+                        'building': room['rd_building'],
+                        'capacity': room['rd_capacity'],
+                        'type': room['rd_type'],
+                        'function': room['rd_function'],
+                        'day': pattern,
+                        'start_time': slot['start_time'],
+                        'end_time': slot['end_time'],
+                        'duration': slot['duration']
+                    })
+                    if len(results) > limit:
+                        return results
+        return results
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Current availability index, rebuilt when the schedule version moves"""
+    global _index
+    version = get_schedule_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = AvailabilityIndex.load(version)
+        return _index
+
+
+def invalidate():
+    """Drop the index, e.g. after rooms or time slots were re-uploaded"""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+# --- Free room search for ad-hoc classes and moved sections ---
+@rooms_bp.route('/rooms/available', methods=['GET'])
+def rooms_available():
+    try:
+        capacity = int(request.args.get('capacity', 0))
+        duration = int(request.args.get('duration', DEFAULT_DURATION))
+        limit = min(max(int(request.args.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        return jsonify({'error': 'capacity, duration and limit must be integers'}), 400
+
+    day_patterns = [p.strip() for p in request.args.get('day_pattern', '').split(',') if p.strip()]
+    unknown = [p for p in day_patterns if p not in DAY_MAPPING]
+    if unknown:
+        return jsonify({'error': f"Unknown day pattern: {', '.join(unknown)}"}), 400
+    program_sections = [p.strip() for p in request.args.get('program_sections', '').split(',') if p.strip()]
+
+    try:
+        index = get_index()
+        results = index.search(
+            capacity=capacity,
+            room_type=request.args.get('room_type') or request.args.get('type'),
+            room_function=request.args.get('room_function') or request.args.get('function'),
+            duration=duration,
+            day_patterns=day_patterns,
+            program_sections=program_sections,
+            limit=limit
+        )
+        return jsonify({
+            'version': index.version,
+            'count': min(len(results), limit),
+            'truncated': len(results) > limit,
+            'results': results[:limit]
+        })
+    except Exception as e:
+        print(f"Error searching room availability: {str(e)}")
+        return jsonify({'error': str(e)}), 500
@@ -1,165 +1,430 @@
-import mysql.connector
-from flask import Blueprint, request, jsonify
 import os
-from dotenv import load_dotenv
+import secrets
+import tempfile
+import time
+
+from flask import Blueprint, request, jsonify
 
-# Load .env values
-load_dotenv()
+import change_log
+import db
+from db import get_connection
+from import_schema import TEMPLATES, UploadError
+from readiness import mark_table, invalidate
+import room_availability
+import staging
+from validation import UNIQUE_KEYS, check, check_references, referenced
 
 save_bp = Blueprint('save_bp', __name__)
 
-def get_connection():
-    return mysql.connector.connect(
-        user=os.getenv("MYSQLUSER", "root"),
-        password=os.getenv("MYSQLPASSWORD", ""),
-        database=os.getenv("MYSQLDATABASE", "schedopt_db"),
-        host=os.getenv("MYSQLHOST", "localhost"),
-        port=int(os.getenv("MYSQLPORT", 3306))
-    )
+# Template -> (table, table columns in the order of the template's columns)
+TABLE_LOADS = {
+    "forecasted": ("tbl_forecasted_enrolled",
+                   ["fe_program_abbr", "fe_department", "fe_year_level", "fe_enrolled_count"]),
+    "programs": ("tbl_program_department",
+                 ["pd_program_abbr", "pd_program_name", "pd_department", "pd_priority_index"]),
+    "prospectus": ("tbl_prospectus_list",
+                   ["pl_program", "pl_department", "pl_year", "pl_course_code", "pl_course_title",
+                    "pl_units", "pl_semester", "pl_type"]),
+    "rooms": ("tbl_room_data",
+              ["rd_room_code", "rd_building", "rd_capacity", "rd_size", "rd_type",
+               "rd_function", "rd_department_owner", "rd_program_owner"]),
+    "timeslots": ("tbl_time_slot", ["ts_key", "ts_start_time", "ts_end_time", "ts_duration"]),
+    "days": ("tbl_day_slot", ["day_key", "day_abbr", "day_long", "day_type"]),
+}
 
-# --- Save Forecasted ---
-@save_bp.route('/save_forecasted', methods=['POST'])
-def save_forecasted():
+# Templates the free-room index is built from
+AVAILABILITY_TEMPLATES = {"rooms", "timeslots"}
+
+# Rows per executemany batch (sent as one multi-row INSERT)
+INSERT_CHUNK_SIZE = int(os.getenv("INSERT_CHUNK_SIZE", 1000))
+
+# Sheets at least this long go through LOAD DATA LOCAL INFILE when enabled
+INFILE_MIN_ROWS = int(os.getenv("INFILE_MIN_ROWS", 5000))
+
+# Rows are matched between uploads by the first unique key of their template
+NATURAL_KEYS = {template: keys[0] for template, keys in UNIQUE_KEYS.items()}
+
+# Row changes a diff is made of, in the order they are logged
+DIFF_ACTIONS = ("insert", "update", "delete")
+
+# Saves changing more than this share of the rows rebuild the table instead of patching it
+DIFF_MAX_CHANGED = float(os.getenv("DIFF_MAX_CHANGED", 0.5))
+
+
+def row_params(template, row):
+    """Insert parameters for one record, typed by the template's column parsers"""
+    params = []
+    for name, parse in TEMPLATES[template]:
+        value = row[name]
+        params.append(None if value is None or value == '' else parse(value))
+    return tuple(params)
+
+
+def database_references(template):
+    """Values a template's foreign keys may take, read from the saved tables.
+
+    Empty or unreadable tables are left out so their keys go unchecked.
+    """
+    references = {}
     try:
-        data = request.json.get('data', [])
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
         conn = get_connection()
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM tbl_forecasted_enrolled")
-        for row in data:
-            query = """
-                INSERT INTO tbl_forecasted_enrolled 
-                (fe_program_abbr, fe_department, fe_year_level, fe_enrolled_count) 
-                VALUES (%s, %s, %s, %s)
-            """
-            cursor.execute(query, (row['PROGRAM'], row['DEPARTMENT'], int(row['YEAR']), int(row['ENROLLED COUNT'])))
-        conn.commit()
-        cursor.close(); conn.close()
-        return jsonify({'success': True})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        print(f"Skipping reference checks for {template}: {str(e)}")
+        return references
+    try:
+        for ref_template, ref_column in referenced(template):
+            table, columns = TABLE_LOADS[ref_template]
+            index = [name for name, _ in TEMPLATES[ref_template]].index(ref_column)
+            cursor.execute(f"SELECT DISTINCT {columns[index]} FROM {table}")
+            values = {row[0] for row in cursor.fetchall()}
+            if values:
+                references[(ref_template, ref_column)] = values
+    except Exception as e:
+        print(f"Skipping reference checks for {template}: {str(e)}")
+    finally:
+        cursor.close(); conn.close()
+    return references
 
 
-# --- Save Programs ---
-@save_bp.route('/save_programs', methods=['POST'])
-def save_programs():
+def insert_rows(cursor, table, columns, params):
+    """Insert typed row tuples in chunks of INSERT_CHUNK_SIZE"""
+    query = f"""
+        INSERT INTO {table}
+        ({', '.join(columns)})
+        VALUES ({', '.join(['%s'] * len(columns))})
+    """
+    for start in range(0, len(params), INSERT_CHUNK_SIZE):
+        cursor.executemany(query, params[start:start + INSERT_CHUNK_SIZE])
+
+
+def infile_field(value):
+    """One field in LOAD DATA's default escaping (NULL as \\N)"""
+    if value is None:
+        return "\\N"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+
+def load_infile(cursor, table, columns, params):
+    """Insert typed row tuples through a tab-separated temp file and LOAD DATA LOCAL INFILE"""
+    with tempfile.NamedTemporaryFile("w", suffix=".tsv", newline="", encoding="utf-8", delete=False) as f:
+        for row in params:
+            f.write("\t".join(infile_field(value) for value in row) + "\n")
+    try:
+        cursor.execute(f"""
+            LOAD DATA LOCAL INFILE %s INTO TABLE {table}
+            CHARACTER SET utf8mb4
+            FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'
+            LINES TERMINATED BY '\\n'
+            ({', '.join(columns)})
+        """, (f.name,))
+    finally:
+        os.remove(f.name)
+
+
+def load_table(cursor, template, params):
+    """Fill a fresh shadow copy of a template's table with typed rows; swap_tables() puts it live.
+
+    Readers keep seeing the old table meanwhile. Returns the table and shadow
+    names with the row count, seconds taken and load method.
+    """
+    table, columns = TABLE_LOADS[template]
+    shadow = f"{table}_load_{secrets.token_hex(4)}"
+    started = time.monotonic()
+    cursor.execute(f"CREATE TABLE {shadow} LIKE {table}")
+    try:
+        method = "executemany"
+        if db.LOCAL_INFILE and len(params) >= INFILE_MIN_ROWS:
+            try:
+                load_infile(cursor, shadow, columns, params)
+                method = "infile"
+            except Exception as e:
+                print(f"LOAD DATA LOCAL INFILE failed for {table}, inserting instead: {str(e)}")
+        if method == "executemany":
+            insert_rows(cursor, shadow, columns, params)
+    except Exception:
+        drop_shadows(cursor, [{'shadow': shadow}])
+        raise
+    return {'table': table, 'shadow': shadow, 'rows': len(params),
+            'seconds': time.monotonic() - started, 'method': method}
+
+
+def swap_tables(cursor, loads):
+    """Swap loaded shadows in for their tables with one atomic RENAME TABLE, then drop the old tables"""
+    renames = []
+    for load in loads:
+        renames += [f"{load['table']} TO {load['shadow']}_old", f"{load['shadow']} TO {load['table']}"]
+    cursor.execute(f"RENAME TABLE {', '.join(renames)}")
+    for load in loads:
+        try:
+            cursor.execute(f"DROP TABLE {load['shadow']}_old")
+        except Exception as e:
+            # The new data is live already; only the retired copy is left behind
+            print(f"Error dropping {load['shadow']}_old: {str(e)}")
+
+
+def drop_shadows(cursor, loads):
+    """Drop shadow tables of loads that won't be swapped in"""
+    for load in loads:
+        try:
+            cursor.execute(f"DROP TABLE IF EXISTS {load['shadow']}")
+        except Exception as e:
+            print(f"Error dropping {load['shadow']}: {str(e)}")
+
+
+def stored_params(template, row):
+    """A row read back from a template's table, typed like row_params()"""
+    params = []
+    for (name, parse), value in zip(TEMPLATES[template], row):
+        try:
+            params.append(None if value is None or value == '' else parse(value))
+        except ValueError:
+            params.append(value)
+    return tuple(params)
+
+
+def key_of(template):
+    """Function picking a typed row's natural key"""
+    names = [name for name, _ in TEMPLATES[template]]
+    positions = [names.index(name) for name in NATURAL_KEYS[template]]
+    return lambda row: tuple(row[i] for i in positions)
+
+
+def diff_rows(cursor, template, params):
+    """Inserts, updates and deletes turning a template's table into params, by natural key.
+
+    Rows are matched on their parsed key; 'stored_keys' maps it to the key
+    as stored, which the UPDATE and DELETE statements match on. None when
+    the stored rows repeat a key or leave part of one NULL, so they can't be
+    matched.
+    """
+    table, columns = TABLE_LOADS[template]
+    key = key_of(template)
+    cursor.execute(f"SELECT {', '.join(columns)} FROM {table}")
+    current, stored_keys = {}, {}
+    for stored in cursor.fetchall():
+        row = stored_params(template, stored)
+        if key(row) in current or None in key(stored):
+            return None
+        current[key(row)] = row
+        stored_keys[key(row)] = key(stored)
+
+    inserts, updates = [], []
+    for row in params:
+        old = current.pop(key(row), None)
+        if old is None:
+            inserts.append(row)
+        elif old != row:
+            updates.append(row)
+    return {'insert': inserts, 'update': updates, 'delete': list(current.values()),
+            'stored_keys': stored_keys}
+
+
+def diff_size(diff):
+    """Rows a diff_rows() result inserts, updates or deletes"""
+    return sum(len(diff[action]) for action in DIFF_ACTIONS)
+
+
+def patchable(diff, rows):
+    """Whether a diff_rows() result is small enough to apply in place instead of reloading the table"""
+    return diff is not None and diff_size(diff) <= DIFF_MAX_CHANGED * max(rows, 1)
+
+
+def change_entries(template, diff):
+    """(action, natural key) pairs of a diff for the change log; a whole reload without one"""
+    if diff is None:
+        return [("reload", None)]
+    key = key_of(template)
+    return [(action, key(row)) for action in DIFF_ACTIONS for row in diff[action]]
+
+
+def apply_diff(cursor, template, diff):
+    """Patch a template's table in place with a diff_rows() result (the caller commits)"""
+    table, columns = TABLE_LOADS[template]
+    key = key_of(template)
+    stored_keys = diff['stored_keys']
+    where = " AND ".join(f"{column} = %s" for column in key(columns))
+    if diff['delete']:
+        cursor.executemany(f"DELETE FROM {table} WHERE {where}",
+                           [stored_keys[key(row)] for row in diff['delete']])
+    if diff['update']:
+        # Key columns are rewritten too, storing them in their parsed form
+        cursor.executemany(
+            f"UPDATE {table} SET {', '.join(f'{column} = %s' for column in columns)} WHERE {where}",
+            [row + stored_keys[key(row)] for row in diff['update']]
+        )
+    if diff['insert']:
+        insert_rows(cursor, table, columns, diff['insert'])
+
+
+def record_swapped(conn, cursor, changes):
+    """record_changes() and commit for tables already swapped in.
+
+    The swap can't be undone, so a change set that fails to log is replaced
+    by a bare 'reload' per table, telling readers to re-read them. Returns
+    the version logged under, or None when nothing could be logged.
+    """
+    for attempt in (changes, {table: [("reload", None)] for table in changes}):
+        try:
+            version = change_log.record_changes(cursor, attempt)
+            conn.commit()
+            return version
+        except Exception as e:
+            print(f"Error logging changes of swapped tables: {str(e)}")
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+    return None
+
+
+def replace_template(conn, cursor, template, records):
+    """Make a template's table hold records, log the change set and commit.
+
+    Small change sets are applied as inserts, updates and deletes in one
+    transaction; larger ones (or tables whose rows can't be matched) are
+    loaded into a shadow table and swapped in.
+    """
+    change_log.ensure_change_schema()
+    table = TABLE_LOADS[template][0]
+    started = time.monotonic()
+    params = [row_params(template, row) for row in records]
+    diff = diff_rows(cursor, template, params)
+
+    if patchable(diff, len(params)):
+        apply_diff(cursor, template, diff)
+        version = change_log.record_changes(cursor, {table: change_entries(template, diff)})
+        conn.commit()
+        stats = {'rows': len(params), 'seconds': time.monotonic() - started, 'method': "diff"}
+    else:
+        stats = load_table(cursor, template, params)
+        try:
+            conn.commit()
+            swap_tables(cursor, [stats])
+        except Exception:
+            drop_shadows(cursor, [stats])
+            raise
+        version = record_swapped(conn, cursor, {table: change_entries(template, diff)})
+        stats['seconds'] = time.monotonic() - started
+    if diff is not None:
+        stats.update({action: len(diff[action]) for action in DIFF_ACTIONS})
+    stats['data_version'] = version
+    return stats
+
+
+def load_report(stats):
+    """Row count, timing, rows per second and change counts of a load"""
+    seconds = stats['seconds']
+    report = {
+        'rows': stats['rows'],
+        'load_seconds': round(seconds, 4),
+        'rows_per_second': round(stats['rows'] / seconds) if seconds > 0 else None,
+        'method': stats['method'],
+    }
+    for name in ('insert', 'update', 'delete', 'data_version'):
+        if name in stats:
+            report[name if name == 'data_version' else name + 's'] = stats[name]
+    return report
+
+
+def loaded(templates):
+    """Refresh the caches that depend on freshly committed tables"""
+    for template in templates:
+        mark_table(TABLE_LOADS[template][0], True)
+    if AVAILABILITY_TEMPLATES & set(templates):
+        room_availability.invalidate()
+
+
+def save_template(template):
+    """Replace a template's rows with a staged upload (by token) or records posted as JSON"""
+    table = TABLE_LOADS[template][0]
     try:
-        data = request.json.get('data', [])
+        payload = request.json or {}
+        token = payload.get('token')
+        if token:
+            staged = staging.store.get(token)
+            if staged is None:
+                return jsonify({'error': 'Upload expired or was already saved; upload the file again'}), 404
+            if staged.template != template:
+                return jsonify({'error': f"Token belongs to a {staged.template} upload"}), 400
+            data = staged.records
+        else:
+            data = payload.get('data', [])
         if not data:
             return jsonify({'error': 'No data provided'}), 400
+        if token:
+            # The rest was checked at upload, but the referenced tables may have changed since
+            check_references(template, data, database_references(template), staged.row_numbers)
+        else:
+            check(template, data, database_references(template))
         conn = get_connection()
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM tbl_program_department")
-        for row in data:
-            query = """
-                INSERT INTO tbl_program_department
-                (pd_program_abbr, pd_program_name, pd_department, pd_priority_index)
-                VALUES (%s, %s, %s, %s)
-            """
-            cursor.execute(query, (row['PROGRAM ABBREVIATION'], row['PROGRAM NAME'], row['DEPARTMENT'], int(row['PRIORITY INDEX'])))
-        conn.commit()
-        cursor.close(); conn.close()
-        return jsonify({'success': True})
+    except UploadError as e:
+        return jsonify({'success': False, 'error': str(e), 'details': e.details}), e.status
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    try:
+        stats = replace_template(conn, cursor, template, data)
+        loaded([template])
+        if token:
+            staging.store.discard(token)
+        return jsonify({'success': True, **load_report(stats)})
     except Exception as e:
+        conn.rollback()
+        invalidate(table)
         return jsonify({'success': False, 'error': str(e)}), 500
+    finally:
+        cursor.close(); conn.close()
+
+
+# --- Save Forecasted ---
+@save_bp.route('/save_forecasted', methods=['POST'])
+def save_forecasted():
+    return save_template('forecasted')
+
+
+# --- Save Programs ---
+@save_bp.route('/save_programs', methods=['POST'])
+def save_programs():
+    return save_template('programs')
 
 
 # --- Save Prospectus ---
 @save_bp.route('/save_prospectus', methods=['POST'])
 def save_prospectus():
-    try:
-        data = request.json.get('data', [])
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM tbl_prospectus_list")
-        for row in data:
-            query = """
-                INSERT INTO tbl_prospectus_list
-                (pl_program, pl_department, pl_year, pl_course_code, pl_course_title, pl_units, pl_semester, pl_type)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(query, (row['PROGRAM ABBREVIATION'], row['DEPARTMENT'], int(row['YEAR']),
-                                   row['COURSE CODE'], row['COURSE TITLE'], int(row['UNITS']),
-                                   int(row['SEMESTER']), row['TYPE']))
-        conn.commit()
-        cursor.close(); conn.close()
-        return jsonify({'success': True})
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    return save_template('prospectus')
 
 
 # --- Save Rooms ---
 @save_bp.route('/save_rooms', methods=['POST'])
 def save_rooms():
-    try:
-        data = request.json.get('data', [])
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM tbl_room_data")
-        for row in data:
-            query = """
-                INSERT INTO tbl_room_data
-                (rd_room_code, rd_building, rd_capacity, rd_size, rd_type,
-                 rd_function, rd_department_owner, rd_program_owner)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(query, (row['ROOM CODE'], row['BUILDING'], int(row['CAPACITY']), row['SIZE'],
-                                   row['TYPE'], row['FUNCTION'], row['DEPARTMENT OWNER'], row['PROGRAM OWNER']))
-        conn.commit()
-        cursor.close(); conn.close()
-        return jsonify({'success': True})
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    return save_template('rooms')
 
 
 # --- Save Timeslots ---
 @save_bp.route('/save_timeslots', methods=['POST'])
 def save_timeslots():
-    try:
-        data = request.json.get('data', [])
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM tbl_time_slot")
-        for row in data:
-            query = """
-                INSERT INTO tbl_time_slot
-                (ts_key, ts_start_time, ts_end_time, ts_duration)
-                VALUES (%s, %s, %s, %s)
-            """
-            cursor.execute(query, (int(row['KEY']), row['START TIME'], row['END TIME'], int(row['DURATION'])))
-        conn.commit()
-        cursor.close(); conn.close()
-        return jsonify({'success': True})
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    return save_template('timeslots')
 
 
 # --- Save Days ---
 @save_bp.route('/save_days', methods=['POST'])
 def save_days():
+    return save_template('days')
+
+
+# --- Changes to the imported tables since a data version ---
+@save_bp.route('/data_changes', methods=['GET'])
+def data_changes():
     try:
-        data = request.json.get('data', [])
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM tbl_day_slot")
-        for row in data:
-            query = """
-                INSERT INTO tbl_day_slot
-                (day_key, day_abbr, day_long, day_type)
-                VALUES (%s, %s, %s, %s)
-            """
-            cursor.execute(query, (int(row['KEY']), row['DAY ABBREVIATION'], row['DAY LONG'], row['DAY TYPE']))
-        conn.commit()
-        cursor.close(); conn.close()
-        return jsonify({'success': True})
+        since = int(request.args.get('since', 0))
+        after = int(request.args.get('after', 0))
+    except ValueError:
+        return jsonify({'error': 'since and after must be integers'}), 400
+    try:
+        version = change_log.get_data_version()
+        changes, has_more = change_log.changes_since(since, version, after)
+        return jsonify({'version': version, 'changes': changes, 'has_more': has_more})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,163 @@
+import base64
+import hashlib
+import json
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from db import get_connection
+from final_assignment import DAY_MAPPING
+from schedule_store import get_schedule_version
+
+schedule_bp = Blueprint('schedule_bp', __name__)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+FETCH_SIZE = 200
+
+SCHEDULE_COLUMNS = [
+    "fa.fa_course_section", "fa.fa_program_section", "fa.fa_student_count", "fa.fa_department",
+    "fa.fa_room_code", "fa.fa_day_abbr", "fa.fa_start_time", "fa.fa_end_time",
+    "fa.fa_course_year", "fa.fa_final_timeslot"
+]
+
+FILTERS = ("room", "program_section", "department", "course", "day", "year")
+
+
+def encode_cursor(course_section):
+    return base64.urlsafe_b64encode(course_section.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(token):
+    return base64.urlsafe_b64decode(token.encode("ascii")).decode("utf-8")
+
+
+def day_abbrs_for(day):
+    """Day abbreviations whose pattern covers the requested day (abbreviation or full name)"""
+    days = DAY_MAPPING.get(day, [day.capitalize()])
+    return sorted(abbr for abbr, covered in DAY_MAPPING.items() if set(days) & set(covered))
+
+
+def build_query(filters, after, limit):
+    """SELECT for one page; every filter maps onto an indexed column"""
+    joins, where, params = [], [], []
+
+    if filters.get("program_section"):
+        joins.append("JOIN tbl_fa_program_section fps ON fps.fps_course_section = fa.fa_course_section")
+        where.append("fps.fps_program_section = %s")
+        params.append(filters["program_section"])
+    if filters.get("room"):
+        where.append("fa.fa_room_code = %s")
+        params.append(filters["room"])
+    if filters.get("department"):
+        where.append("fa.fa_department = %s")
+        params.append(filters["department"])
+    if filters.get("course"):
+        # Course sections are named <course code>-<year>-<letter>. SQLite has no default
+        # LIKE escape and MySQL and SQLite read a '\\' literal differently, so '!' is named
+        course = filters["course"].replace("!", "!!").replace("%", "!%").replace("_", "!_")
+        where.append("fa.fa_course_section LIKE %s ESCAPE '!'")
+        params.append(f"{course}-%")
+    if filters.get("day"):
+        abbrs = day_abbrs_for(filters["day"])
+        if not abbrs:
+            raise ValueError(f"Unknown day: {filters['day']}")
+        where.append(f"fa.fa_day_abbr IN ({', '.join(['%s'] * len(abbrs))})")
+        params.extend(abbrs)
+    if filters.get("year"):
+        where.append("fa.fa_course_year = %s")
+        params.append(int(filters["year"]))
+    if after is not None:
+        where.append("fa.fa_course_section > %s")
+        params.append(after)
+
+    query = f"SELECT {', '.join(SCHEDULE_COLUMNS)} FROM tbl_final_assignment fa"
+    if joins:
+        query += " " + " ".join(joins)
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY fa.fa_course_section LIMIT %s"
+    params.append(limit + 1)    # one extra row tells us whether another page exists
+    return query, params
+
+
+def row_to_item(row):
+    (course_section, program_sections, student_count, department, room,
+     day, start_time, end_time, year, timeslot) = row
+    return {
+        "course_section": course_section,
+        "program_sections": [p.strip() for p in (program_sections or "").split(",") if p.strip()],
+        "student_count": student_count,
+        "department": department,
+        "room": room,
+        "day": day,
+        "start_time": start_time,
+        "end_time": end_time,
+        "year": year,
+        "timeslot": timeslot
+    }
+
+
+def stream_page(conn, cursor, limit, version):
+    """Yield the JSON page incrementally while rows arrive from the cursor"""
+    try:
+        yield '{"version": %d, "items": [' % version
+        count, last_key = 0, None
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                if count == limit:
+                    # Extra row: there is a next page; drain the rest of the result
+                    cursor.fetchall()
+                    yield '], "next_cursor": %s}' % json.dumps(encode_cursor(last_key))
+                    return
+                yield ("," if count else "") + json.dumps(row_to_item(row), default=str)
+                count += 1
+                last_key = row[0]
+        yield '], "next_cursor": null}'
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# --- Paginated, filterable view of the final schedule ---
+@schedule_bp.route('/schedule', methods=['GET'])
+def get_schedule():
+    try:
+        filters = {name: request.args.get(name, "").strip() for name in FILTERS}
+        limit = min(max(int(request.args.get("limit", DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        token = request.args.get("cursor")
+        after = decode_cursor(token) if token else None
+        query, params = build_query(filters, after, limit)
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({'error': f"Invalid query: {str(e)}"}), 400
+
+    try:
+        version = get_schedule_version()
+        args_key = json.dumps(sorted(request.args.items()))
+        etag = f"v{version}-{hashlib.sha1(args_key.encode('utf-8')).hexdigest()[:16]}"
+        if etag in request.if_none_match:
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+        except Exception:
+            cursor.close()
+            conn.close()
+            raise
+
+        response = Response(
+            stream_with_context(stream_page(conn, cursor, limit, version)),
+            mimetype='application/json'
+        )
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    except Exception as e:
+        print(f"Error reading schedule: {str(e)}")
+        return jsonify({'error': str(e)}), 500
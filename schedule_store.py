@@ -0,0 +1,120 @@
+import threading
+
+from mysql.connector import errorcode
+
+from db import get_connection, Error
+
+# Read-side tables kept next to tbl_final_assignment
+SCHEDULE_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS tbl_schedule_version (
+        sv_id TINYINT NOT NULL PRIMARY KEY,
+        sv_version BIGINT NOT NULL,
+        sv_updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # fa_program_section is a comma-joined list; one row per program section makes it indexable
+    """
+    CREATE TABLE IF NOT EXISTS tbl_fa_program_section (
+        fps_program_section VARCHAR(64) NOT NULL,
+        fps_course_section VARCHAR(64) NOT NULL,
+        PRIMARY KEY (fps_program_section, fps_course_section),
+        KEY idx_fps_course_section (fps_course_section)
+    )
+    """,
+]
+
+# Every filter index ends with fa_course_section, the keyset pagination key
+SCHEDULE_INDEXES = [
+    ("idx_fa_course_section", "tbl_final_assignment", "fa_course_section"),
+    ("idx_fa_room", "tbl_final_assignment", "fa_room_code, fa_course_section"),
+    ("idx_fa_department", "tbl_final_assignment", "fa_department, fa_course_section"),
+    ("idx_fa_year", "tbl_final_assignment", "fa_course_year, fa_course_section"),
+    ("idx_fa_day", "tbl_final_assignment", "fa_day_abbr, fa_course_section"),
+]
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def ensure_schedule_schema():
+    """Create the read-side tables and indexes once per process"""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            for ddl in SCHEDULE_DDL:
+                cursor.execute(ddl)
+            # Seeded here so concurrent first publishes only ever UPDATE the row
+            cursor.execute("INSERT IGNORE INTO tbl_schedule_version (sv_id, sv_version) VALUES (1, 0)")
+            for name, table, columns in SCHEDULE_INDEXES:
+                try:
+                    cursor.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+                except Error as e:
+                    if getattr(e, 'errno', None) != errorcode.ER_DUP_KEYNAME:
+                        raise
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+        _schema_ready = True
+
+
+def get_schedule_version():
+    """Current version of tbl_final_assignment (0 before the first publish)"""
+    ensure_schedule_schema()
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT sv_version FROM tbl_schedule_version WHERE sv_id = 1")
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+    return row[0] if row else 0
+
+
+def publish_schedule():
+    """Rebuild the program-section mapping and bump the schedule version.
+
+    Called whenever tbl_final_assignment was rewritten, so readers can key
+    caches and ETags on the version.
+    """
+    ensure_schedule_schema()
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT fa_course_section, fa_program_section FROM tbl_final_assignment")
+        mapping = set()
+        for course_section, program_sections in cursor.fetchall():
+            for program_section in (program_sections or '').split(','):
+                if program_section.strip():
+                    mapping.add((program_section.strip(), course_section))
+
+        cursor.execute("DELETE FROM tbl_fa_program_section")
+        if mapping:
+            cursor.executemany(
+                "INSERT INTO tbl_fa_program_section (fps_program_section, fps_course_section) VALUES (%s, %s)",
+                sorted(mapping)
+            )
+
+        cursor.execute(
+            "UPDATE tbl_schedule_version SET sv_version = sv_version + 1, sv_updated_at = CURRENT_TIMESTAMP "
+            "WHERE sv_id = 1"
+        )
+        conn.commit()
+
+        cursor.execute("SELECT sv_version FROM tbl_schedule_version WHERE sv_id = 1")
+        version = cursor.fetchone()[0]
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    return version
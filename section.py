@@ -1,26 +1,15 @@
-import mysql.connector
 import string
 from math import ceil
-import os
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
-
-db_config = {
-    'host': os.getenv("MYSQLHOST", "localhost"),
-    'user': os.getenv("MYSQLUSER", "root"),
-    'password': os.getenv("MYSQLPASSWORD", ""),
-    'database': os.getenv("MYSQLDATABASE", "schedopt_db"),
-    'port': int(os.getenv("MYSQLPORT", 3306))
-}
+from db import get_connection
+from models import ProgramSection
 
 MAX_PER_SECTION = 40
 ALPHABET = string.ascii_uppercase
 
 def section_students():
-    conn = mysql.connector.connect(**db_config)
-    cursor = conn.cursor(dictionary=True)
+    conn = get_connection()
+    cursor = conn.cursor()
     cursor.execute("DELETE FROM tbl_program_sections")
 
     cursor.execute("""
@@ -30,11 +19,8 @@ def section_students():
     """)
     rows = cursor.fetchall()
 
-    for row in rows:
-        abbr = row['fe_program_abbr']
-        year = row['fe_year_level']
-        total = row['fe_enrolled_count']
-        priority = row['pd_priority_index']
+    sections = []
+    for abbr, year, total, priority in rows:
 
         # Total section number (case of 40 students)
         num_sections = ceil(total / MAX_PER_SECTION)
@@ -47,14 +33,16 @@ def section_students():
             group = ALPHABET[i]
             section_final = f"{abbr}-{year}-{group}"
             population = base + 1 if i < remainder else base
-
-            cursor.execute("""
-                INSERT INTO tbl_program_sections (
-                    ps_program_abbr, ps_year_level, ps_section_group,
-                    ps_section_final, ps_section_population, ps_priority_index
-                )
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (abbr, year, group, section_final, population, priority))
+            sections.append(ProgramSection(abbr, year, group, section_final, population, priority))
+
+    if sections:
+        cursor.executemany("""
+            INSERT INTO tbl_program_sections (
+                ps_program_abbr, ps_year_level, ps_section_group,
+                ps_section_final, ps_section_population, ps_priority_index
+            )
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, [section[:6] for section in sections])
 
     conn.commit()
     cursor.close()
@@ -0,0 +1,84 @@
+import threading
+
+
+class RunCancelled(Exception):
+    """Raised inside a run when its cancel token was triggered"""
+
+
+class CancelToken:
+    """Cooperative cancellation flag checked by long-running work"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        if self._event.is_set():
+            raise RunCancelled("Run was cancelled")
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.token = CancelToken()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run at most one call per key; concurrent callers share its outcome"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """Call fn(cancel_token) unless a call for key is already in flight.
+
+        Returns (result, shared) where shared tells whether this caller
+        attached to someone else's call. Errors are re-raised to every caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(call.token)
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def cancel(self, match=None):
+        """Cancel in-flight calls whose key satisfies match (all when None)"""
+        with self._lock:
+            calls = [(key, call) for key, call in self._calls.items() if match is None or match(key)]
+        for _, call in calls:
+            call.token.cancel()
+        return [key for key, _ in calls]
+
+    def in_flight(self):
+        with self._lock:
+            return list(self._calls)
+
+
+flights = SingleFlight()
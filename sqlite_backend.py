@@ -0,0 +1,269 @@
+import re
+import sqlite3
+import threading
+import zlib
+
+# Tables the pipeline reads and writes; MySQL deployments create these themselves.
+# The scheduler reads tbl_day_slot as ds_abbr / ds_day_type while the importer
+# writes day_abbr / day_type, so the former are kept as generated columns.
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS tbl_forecasted_enrolled (
+        fe_program_abbr TEXT, fe_department TEXT, fe_year_level INTEGER, fe_enrolled_count INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tbl_program_department (
+        pd_program_abbr TEXT, pd_program_name TEXT, pd_department TEXT, pd_priority_index INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tbl_prospectus_list (
+        pl_program TEXT, pl_department TEXT, pl_year INTEGER, pl_course_code TEXT,
+        pl_course_title TEXT, pl_units INTEGER, pl_semester INTEGER, pl_type TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tbl_room_data (
+        rd_room_code TEXT, rd_building TEXT, rd_capacity INTEGER, rd_size TEXT, rd_type TEXT,
+        rd_function TEXT, rd_department_owner TEXT, rd_program_owner TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tbl_time_slot (
+        ts_key INTEGER, ts_start_time TEXT, ts_end_time TEXT, ts_duration INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tbl_day_slot (
+        day_key INTEGER, day_abbr TEXT, day_long TEXT, day_type TEXT,
+        ds_abbr TEXT GENERATED ALWAYS AS (day_abbr) VIRTUAL,
+        ds_day_type TEXT GENERATED ALWAYS AS (day_type) VIRTUAL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tbl_program_sections (
+        ps_program_abbr TEXT, ps_year_level INTEGER, ps_section_group TEXT,
+        ps_section_final TEXT, ps_section_population INTEGER, ps_priority_index INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tbl_course_section (
+        cs_course_section TEXT, cs_program_section TEXT, cs_student_count INTEGER, cs_department TEXT,
+        cs_course_type TEXT, cs_semester INTEGER, cs_units INTEGER, cs_course_year INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tbl_initial_assignments (
+        ia_course_section TEXT, ia_room_code TEXT, ia_day_abbr TEXT, ia_start_time TEXT, ia_end_time TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tbl_final_assignment (
+        fa_course_section TEXT, fa_program_section TEXT, fa_student_count INTEGER, fa_department TEXT,
+        fa_room_code TEXT, fa_day_abbr TEXT, fa_start_time TEXT, fa_end_time TEXT,
+        fa_course_year INTEGER, fa_final_timeslot TEXT
+    )
+    """,
+]
+
+_schema_lock = threading.Lock()
+_initialized = set()
+# In-memory databases live only while a connection is open
+_keepalive = {}
+
+PLACEHOLDER = re.compile(r"%\((\w+)\)s|%s")
+# RIGHT is a join keyword in SQLite, so the function goes by another name
+RIGHT_CALL = re.compile(r"\bRIGHT\s*\(", re.I)
+INLINE_KEY = re.compile(r",\s*(?:UNIQUE\s+)?KEY\s+(\w+)\s*\(([^)]*)\)", re.I)
+
+
+def substring_index(value, delimiter, count):
+    """MySQL SUBSTRING_INDEX()"""
+    if value is None or delimiter is None or count is None:
+        return None
+    parts = str(value).split(delimiter)
+    return delimiter.join(parts[:count] if count >= 0 else parts[count:]) if count else ""
+
+
+def right(value, length):
+    """MySQL RIGHT()"""
+    if value is None or length is None:
+        return None
+    return str(value)[-length:] if length > 0 else ""
+
+
+def char_length(value):
+    """MySQL CHAR_LENGTH()"""
+    return None if value is None else len(str(value))
+
+
+def translate(sql):
+    """Placeholders and DDL of the MySQL dialect in SQLite form (CREATE TABLE keys become indexes)"""
+    sql = PLACEHOLDER.sub(lambda m: f":{m.group(1)}" if m.group(1) else "?", sql)
+    sql = RIGHT_CALL.sub("MYSQL_RIGHT(", sql)
+    stripped = sql.lstrip()
+    head = stripped[:32].upper()
+    if head.startswith("INSERT IGNORE"):
+        return ["INSERT OR IGNORE" + stripped[len("INSERT IGNORE"):]]
+    if head.startswith("TRUNCATE TABLE"):
+        return [f"DELETE FROM {stripped[len('TRUNCATE TABLE'):].strip()}"]
+    if head.startswith("CREATE INDEX"):
+        return ["CREATE INDEX IF NOT EXISTS" + stripped[len("CREATE INDEX"):]]
+    if head.startswith("CREATE TABLE"):
+        table = re.match(r"CREATE TABLE (?:IF NOT EXISTS )?(\w+)", stripped, re.I).group(1)
+        indexes = [f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"
+                   for name, columns in INLINE_KEY.findall(stripped)]
+        stripped = INLINE_KEY.sub("", stripped)
+        stripped = re.sub(r"BIGINT\s+NOT\s+NULL\s+AUTO_INCREMENT\s+PRIMARY\s+KEY",
+                          "INTEGER PRIMARY KEY AUTOINCREMENT", stripped, flags=re.I)
+        return [stripped] + indexes
+    return [sql]
+
+
+class SQLiteCursor:
+    """Cursor accepting the MySQL statements the app issues, including the
+    MySQL-only CHECKSUM TABLE, CREATE TABLE ... LIKE and RENAME TABLE"""
+
+    def __init__(self, conn, dictionary=False):
+        self._conn = conn
+        self._cursor = conn.cursor()
+        self._dictionary = dictionary
+        self._rows = None
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, operation, params=()):
+        self._rows = None
+        head = operation.lstrip()[:16].upper()
+        if head.startswith("CHECKSUM TABLE"):
+            return self._checksum(operation.strip()[len("CHECKSUM TABLE"):])
+        if head.startswith("RENAME TABLE"):
+            return self._rename(operation.strip()[len("RENAME TABLE"):])
+        like = re.match(r"\s*CREATE TABLE (\w+) LIKE (\w+)\s*$", operation, re.I)
+        if like:
+            return self._create_like(like.group(1), like.group(2))
+        statements = translate(operation)
+        self._cursor.execute(statements[0], params or ())
+        for statement in statements[1:]:
+            self._conn.execute(statement)
+
+    def executemany(self, operation, seq_params):
+        self._rows = None
+        self._cursor.executemany(translate(operation)[0], seq_params)
+
+    def _checksum(self, tables):
+        """Order-independent content checksum per table (None when the table is missing)"""
+        rows = []
+        for table in (name.strip() for name in tables.split(",")):
+            try:
+                content = self._conn.execute(f"SELECT * FROM {table}")
+            except sqlite3.OperationalError:
+                rows.append((table, None))
+                continue
+            checksum = 0
+            for row in content:
+                checksum = (checksum + zlib.crc32(repr(row).encode("utf-8"))) & 0xFFFFFFFFFFFF
+            rows.append((table, checksum))
+        self._rows = rows
+
+    def _rename(self, pairs):
+        # SQLite DDL is transactional, so the renames land together
+        self._conn.execute("SAVEPOINT rename_tables")
+        try:
+            for pair in pairs.split(","):
+                old, new = re.split(r"\s+TO\s+", pair.strip(), flags=re.I)
+                self._conn.execute(f"ALTER TABLE {old} RENAME TO {new}")
+        except Exception:
+            self._conn.execute("ROLLBACK TO rename_tables")
+            raise
+        finally:
+            self._conn.execute("RELEASE rename_tables")
+
+    def _create_like(self, table, source):
+        row = self._conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (source,)
+        ).fetchone()
+        if row is None:
+            raise sqlite3.OperationalError(f"no such table: {source}")
+        ddl = re.sub(r"^CREATE TABLE (?:IF NOT EXISTS )?\"?\w+\"?", f"CREATE TABLE {table}", row[0], flags=re.I)
+        self._conn.execute(ddl)
+
+    def _shape(self, rows):
+        if self._dictionary and rows:
+            names = [column[0] for column in self._cursor.description]
+            return [dict(zip(names, row)) for row in rows]
+        return rows
+
+    def fetchone(self):
+        if self._rows is not None:
+            return self._rows.pop(0) if self._rows else None
+        row = self._cursor.fetchone()
+        return self._shape([row])[0] if row is not None else None
+
+    def fetchmany(self, size=1):
+        if self._rows is not None:
+            rows, self._rows = self._rows[:size], self._rows[size:]
+            return rows
+        return self._shape(self._cursor.fetchmany(size))
+
+    def fetchall(self):
+        if self._rows is not None:
+            rows, self._rows = self._rows, []
+            return rows
+        return self._shape(self._cursor.fetchall())
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, dictionary=False, **kwargs):
+        return SQLiteCursor(self._conn, dictionary)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+def connect(path, timeout=10):
+    """Open a connection to the SQLite database at path (a file, or a
+    'file:name?mode=memory&cache=shared' URI), creating the schema on first use"""
+    conn = sqlite3.connect(path, timeout=timeout, uri=path.startswith("file:"), check_same_thread=False)
+    conn.create_function("SUBSTRING_INDEX", 3, substring_index, deterministic=True)
+    conn.create_function("MYSQL_RIGHT", 2, right, deterministic=True)
+    conn.create_function("CHAR_LENGTH", 1, char_length, deterministic=True)
+    if path not in _initialized:
+        with _schema_lock:
+            if path not in _initialized:
+                if "mode=memory" in path:
+                    _keepalive[path] = sqlite3.connect(path, uri=True, check_same_thread=False)
+                else:
+                    # Readers keep going while a save or a run writes
+                    conn.execute("PRAGMA journal_mode=WAL")
+                for ddl in SCHEMA:
+                    conn.execute(ddl)
+                conn.commit()
+                _initialized.add(path)
+    return SQLiteConnection(conn)
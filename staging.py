@@ -0,0 +1,77 @@
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+# Parsed uploads kept server-side until saved, discarded or expired
+STAGING_TTL = int(os.getenv("STAGING_TTL", 900))
+STAGING_MAX_ENTRIES = int(os.getenv("STAGING_MAX_ENTRIES", 32))
+
+
+class StagedUpload:
+    def __init__(self, template, records, expires_at, row_numbers=None):
+        self.template = template
+        self.records = records
+        self.expires_at = expires_at
+        self.row_numbers = row_numbers
+
+    def page(self, page, page_size):
+        """Records of one page (pages start at 1) and whether more follow"""
+        start = (page - 1) * page_size
+        return self.records[start:start + page_size], start + page_size < len(self.records)
+
+
+class StagingStore:
+    """Token-keyed parsed uploads, bounded in count and evicted after STAGING_TTL"""
+
+    def __init__(self, ttl=STAGING_TTL, max_entries=STAGING_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.evicted = 0
+
+    def _evict(self, now):
+        expired = [token for token, entry in self._entries.items() if entry.expires_at <= now]
+        for token in expired:
+            del self._entries[token]
+        # Oldest uploads make room for new ones
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+        self.evicted += len(expired)
+
+    def put(self, template, records, row_numbers=None):
+        token = secrets.token_urlsafe(16)
+        now = time.monotonic()
+        with self._lock:
+            self._entries[token] = StagedUpload(template, records, now + self.ttl, row_numbers)
+            self._evict(now)
+        return token
+
+    def get(self, token):
+        """The staged upload, or None once it was saved, discarded or expired"""
+        with self._lock:
+            self._evict(time.monotonic())
+            return self._entries.get(token)
+
+    def discard(self, token):
+        with self._lock:
+            return self._entries.pop(token, None) is not None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+store = StagingStore()
+
+metrics.register(metrics.GaugeCallback(
+    "schedopt_staged_uploads", "Parsed uploads waiting to be saved",
+    lambda: len(store)))
+metrics.register(metrics.GaugeCallback(
+    "schedopt_staged_uploads_evicted_total", "Staged uploads dropped by TTL or capacity",
+    lambda: store.evicted, metric_type="counter"))
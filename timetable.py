@@ -0,0 +1,128 @@
+from collections import defaultdict
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, NamedStyle
+from openpyxl.utils import get_column_letter
+
+from final_assignment import DAY_MAPPING
+from room_availability import to_minutes
+
+TIMETABLE_COLUMNS = ['fa_course_section', 'fa_program_section', 'fa_room_code',
+                     'fa_day_abbr', 'fa_start_time', 'fa_end_time']
+WEEK_DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+TIME_COLUMN_WIDTH = 22
+DAY_COLUMN_WIDTH = 26
+
+# Characters Excel does not allow in sheet titles
+INVALID_TITLE_CHARS = '[]:*?/\\'
+
+
+def format_minutes(minutes):
+    """'7:30 AM' style label for minutes since midnight"""
+    hour, minute = divmod(minutes, 60)
+    return f"{(hour - 1) % 12 + 1}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+class Occupancy:
+    """Weekly grid contents of every room and program section, built in one pass"""
+
+    def __init__(self, assignments):
+        slots = set()
+        # (kind, owner) -> {(slot, day): [labels]}
+        self.cells = defaultdict(lambda: defaultdict(list))
+        for course_section, program_sections, room, day_abbr, start_time, end_time in assignments:
+            slot = (to_minutes(start_time), to_minutes(end_time))
+            slots.add(slot)
+            sections = [p.strip() for p in (program_sections or '').split(',') if p.strip()]
+            for day in DAY_MAPPING.get(day_abbr, []):
+                self.cells[('Room', room)][(slot, day)].append(
+                    f"{course_section} ({', '.join(sections)})" if sections else course_section
+                )
+                for program_section in sections:
+                    self.cells[('Section', program_section)][(slot, day)].append(f"{course_section} @ {room}")
+        self.slots = sorted(slots)
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(df[TIMETABLE_COLUMNS].itertuples(index=False, name=None))
+
+    @classmethod
+    def from_database(cls):
+        """Occupancy read from tbl_final_assignment in chunks"""
+        from export import iter_assignment_chunks
+
+        return cls(row for rows in iter_assignment_chunks(TIMETABLE_COLUMNS) for row in rows)
+
+    def owners(self):
+        """Rooms first, then program sections, each in sorted order"""
+        return sorted(self.cells, key=lambda owner: (owner[0] != 'Room', str(owner[1])))
+
+    def grid(self, owner):
+        """Rows of (time label, cell text per day) for one room or program section"""
+        cells = self.cells[owner]
+        for slot in self.slots:
+            entries = [cells.get((slot, day)) for day in WEEK_DAYS]
+            if any(entries):
+                yield (f"{format_minutes(slot[0])} - {format_minutes(slot[1])}",
+                       ['\n'.join(entry) if entry else None for entry in entries])
+
+
+def sheet_title(owner, used):
+    """Unique Excel-safe sheet title (at most 31 characters)"""
+    kind, name = owner
+    title = ''.join('_' if ch in INVALID_TITLE_CHARS else ch for ch in f"{kind} {name}")[:31]
+    candidate, counter = title, 2
+    while candidate.lower() in used:
+        suffix = f" ({counter})"
+        candidate = title[:31 - len(suffix)] + suffix
+        counter += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+def create_timetable_file(timetable_file="Final_Timetables.xlsx", df=None):
+    """Workbook with one weekly grid sheet per room and per program section.
+
+    Uses the raw assignment frame df when given, otherwise reads
+    tbl_final_assignment in chunks.
+    """
+    occupancy = Occupancy.from_frame(df) if df is not None else Occupancy.from_database()
+
+    wb = Workbook(write_only=True)
+    header = NamedStyle(name='timetable_header', font=Font(bold=True),
+                        alignment=Alignment(horizontal='center', vertical='center'))
+    body = NamedStyle(name='timetable_cell',
+                      alignment=Alignment(horizontal='center', vertical='center', wrap_text=True))
+    wb.add_named_style(header)
+    wb.add_named_style(body)
+
+    def cell(ws, value, style):
+        written = WriteOnlyCell(ws, value=value)
+        written.style = style
+        return written
+
+    used_titles = set()
+    for owner in occupancy.owners():
+        ws = wb.create_sheet(sheet_title(owner, used_titles))
+        ws.column_dimensions['A'].width = TIME_COLUMN_WIDTH
+        for col_num in range(2, len(WEEK_DAYS) + 2):
+            ws.column_dimensions[get_column_letter(col_num)].width = DAY_COLUMN_WIDTH
+        ws.freeze_panes = 'B3'
+
+        ws.append([cell(ws, f"{owner[0]}: {owner[1]}", 'timetable_header')])
+        ws.append([cell(ws, value, 'timetable_header') for value in ['Time'] + WEEK_DAYS])
+        for label, entries in occupancy.grid(owner):
+            ws.append([cell(ws, label, 'timetable_header')] +
+                      [cell(ws, entry, 'timetable_cell') for entry in entries])
+
+    if not used_titles:
+        wb.create_sheet("Timetables")
+
+    wb.save(timetable_file)
+    print(f"Timetable workbook created: {timetable_file}")
+    return timetable_file
+
+
+if __name__ == "__main__":
+    create_timetable_file()
@@ -1,152 +1,125 @@
-import pandas as pd
 from flask import Blueprint, request, jsonify
-import os
 from dotenv import load_dotenv
+
+from import_schema import UploadError, read_upload, parse_workbook, MAX_UPLOAD_BYTES
+from save_scripts import database_references
+from validation import check
+import staging
 # Load .env values
 load_dotenv()
 
 upload_bp = Blueprint('upload_bp', __name__)
-UPLOAD_FOLDER = 'uploads'
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
 
-# --- Upload & Preview Excel for Forecasted ---
-@upload_bp.route('/upload_forecasted', methods=['POST'])
-def upload_forecasted():
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Room for the multipart boundaries and headers around the file itself
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+def page_args():
+    """page (from 1) and page_size query arguments; page_size is None when not paginating"""
+    page = max(int(request.args.get('page', 1)), 1)
+    page_size = request.args.get('page_size')
+    if page_size is not None:
+        page_size = min(max(int(page_size), 1), MAX_PAGE_SIZE)
+    return page, page_size
+
+
+def preview_upload(template):
+    """Parse and validate the uploaded workbook in memory and return its typed rows"""
+    # Refuse oversized bodies before the multipart form is parsed at all
+    if request.content_length and request.content_length > MAX_UPLOAD_BYTES + FORM_OVERHEAD_BYTES:
+        return jsonify({'error': f"File is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB"}), 413
     if 'file' not in request.files:
         return jsonify({'error': 'No file uploaded in request'}), 400
     file = request.files['file']
     if file.filename == '':
         return jsonify({'error': 'No file selected'}), 400
-    file_path = os.path.join(UPLOAD_FOLDER, file.filename)
-    file.save(file_path)
 
     try:
-        df = pd.read_excel(file_path)
-        required_columns = ["PROGRAM", "DEPARTMENT", "YEAR", "ENROLLED COUNT"]
-        if not all(col in df.columns for col in required_columns):
-            missing = [col for col in required_columns if col not in df.columns]
-            return jsonify({'error': f"Excel missing required columns: {', '.join(missing)}"}), 400
-        return jsonify({'output': df.to_dict(orient='records')})
+        page, page_size = page_args()
+    except ValueError:
+        return jsonify({'error': 'page and page_size must be integers'}), 400
+
+    try:
+        row_numbers = []
+        records = parse_workbook(read_upload(file), template, row_numbers=row_numbers)
+        check(template, records, database_references(template), row_numbers)
+        token = staging.store.put(template, records, row_numbers)
+        body = {'token': token, 'template': template, 'total': len(records),
+                'expires_in': staging.store.ttl}
+        if page_size is None:
+            # Clients that send the rows back to /save_* still get all of them
+            body['output'] = records
+        else:
+            body['output'], body['has_more'] = staging.store.get(token).page(page, page_size)
+            body['page'], body['page_size'] = page, page_size
+        return jsonify(body)
+    except UploadError as e:
+        body = {'error': str(e)}
+        if e.details:
+            body['details'] = e.details
+        return jsonify(body), e.status
     except Exception as e:
         return jsonify({'error': f"Failed to process Excel file: {str(e)}"}), 500
 
 
+# --- Upload & Preview Excel for Forecasted ---
+@upload_bp.route('/upload_forecasted', methods=['POST'])
+def upload_forecasted():
+    return preview_upload('forecasted')
+
+
 # --- Upload & Preview Excel for Programs ---
 @upload_bp.route('/upload_programs', methods=['POST'])
 def upload_programs():
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file uploaded in request'}), 400
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
-    file_path = os.path.join(UPLOAD_FOLDER, file.filename)
-    file.save(file_path)
-
-    try:
-        df = pd.read_excel(file_path)
-        required_columns = ["PROGRAM ABBREVIATION", "PROGRAM NAME", "DEPARTMENT", "PRIORITY INDEX"]
-        if not all(col in df.columns for col in required_columns):
-            missing = [col for col in required_columns if col not in df.columns]
-            return jsonify({'error': f"Excel missing required columns: {', '.join(missing)}"}), 400
-        return jsonify({'output': df.to_dict(orient='records')})
-    except Exception as e:
-        return jsonify({'error': f"Failed to process Excel file: {str(e)}"}), 500
+    return preview_upload('programs')
 
 
 # --- Upload & Preview Excel for Prospectus ---
 @upload_bp.route('/upload_prospectus', methods=['POST'])
 def upload_prospectus():
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file uploaded in request'}), 400
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
-    file_path = os.path.join(UPLOAD_FOLDER, file.filename)
-    file.save(file_path)
-
-    try:
-        df = pd.read_excel(file_path)
-        required_columns = [
-            "PROGRAM ABBREVIATION", "DEPARTMENT", "YEAR", "COURSE CODE",
-            "COURSE TITLE", "UNITS", "SEMESTER", "TYPE"
-        ]
-        if not all(col in df.columns for col in required_columns):
-            missing = [col for col in required_columns if col not in df.columns]
-            return jsonify({'error': f"Excel missing required columns: {', '.join(missing)}"}), 400
-        return jsonify({'output': df.to_dict(orient='records')})
-    except Exception as e:
-        return jsonify({'error': f"Failed to process Excel file: {str(e)}"}), 500
+    return preview_upload('prospectus')
 
 
 # --- Upload & Preview Excel for Rooms ---
 @upload_bp.route('/upload_rooms', methods=['POST'])
 def upload_rooms():
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file uploaded in request'}), 400
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
-    file_path = os.path.join(UPLOAD_FOLDER, file.filename)
-    file.save(file_path)
-
-    try:
-        df = pd.read_excel(file_path)
-        required_columns = [
-            "ROOM CODE", "BUILDING", "CAPACITY", "SIZE", "TYPE",
-            "FUNCTION", "DEPARTMENT OWNER", "PROGRAM OWNER"
-        ]
-        if not all(col in df.columns for col in required_columns):
-            missing = [col for col in required_columns if col not in df.columns]
-            return jsonify({'error': f"Excel missing required columns: {', '.join(missing)}"}), 400
-        return jsonify({'output': df.to_dict(orient='records')})
-    except Exception as e:
-        return jsonify({'error': f"Failed to process Excel file: {str(e)}"}), 500
+    return preview_upload('rooms')
 
 
 # --- Upload & Preview Excel for Timeslots ---
 @upload_bp.route('/upload_timeslots', methods=['POST'])
 def upload_timeslots():
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file uploaded in request'}), 400
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
-    file_path = os.path.join(UPLOAD_FOLDER, file.filename)
-    file.save(file_path)
-
-    try:
-        df = pd.read_excel(file_path)
-        required_columns = ["KEY", "START TIME", "END TIME", "DURATION"]
-        if not all(col in df.columns for col in required_columns):
-            missing = [col for col in required_columns if col not in df.columns]
-            return jsonify({'error': f"Excel missing required columns: {', '.join(missing)}"}), 400
-
-        df['START TIME'] = df['START TIME'].apply(lambda x: x.strftime("%H:%M") if pd.notnull(x) else "")
-        df['END TIME'] = df['END TIME'].apply(lambda x: x.strftime("%H:%M") if pd.notnull(x) else "")
-
-        return jsonify({'output': df.to_dict(orient='records')})
-    except Exception as e:
-        return jsonify({'error': f"Failed to process Excel file: {str(e)}"}), 500
+    return preview_upload('timeslots')
 
 
 # --- Upload & Preview Excel for Days ---
 @upload_bp.route('/upload_days', methods=['POST'])
 def upload_days():
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file uploaded in request'}), 400
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
-    file_path = os.path.join(UPLOAD_FOLDER, file.filename)
-    file.save(file_path)
+    return preview_upload('days')
 
+
+# --- Further preview pages of a staged upload ---
+@upload_bp.route('/staged/<token>', methods=['GET'])
+def staged_page(token):
+    staged = staging.store.get(token)
+    if staged is None:
+        return jsonify({'error': 'Upload expired or was already saved; upload the file again'}), 404
     try:
-        df = pd.read_excel(file_path)
-        required_columns = ["KEY", "DAY ABBREVIATION", "DAY LONG", "DAY TYPE"]
-        if not all(col in df.columns for col in required_columns):
-            missing = [col for col in required_columns if col not in df.columns]
-            return jsonify({'error': f"Excel missing required columns: {', '.join(missing)}"}), 400
-        return jsonify({'output': df.to_dict(orient='records')})
-    except Exception as e:
-        return jsonify({'error': f"Failed to process Excel file: {str(e)}"}), 500
+        page, page_size = page_args()
+    except ValueError:
+        return jsonify({'error': 'page and page_size must be integers'}), 400
+    page_size = page_size or DEFAULT_PAGE_SIZE
+    rows, has_more = staged.page(page, page_size)
+    return jsonify({'token': token, 'template': staged.template, 'total': len(staged.records),
+                    'page': page, 'page_size': page_size, 'has_more': has_more, 'output': rows})
+
+
+# --- Drop a staged upload without saving it ---
+@upload_bp.route('/staged/<token>', methods=['DELETE'])
+def discard_staged(token):
+    if not staging.store.discard(token):
+        return jsonify({'error': 'Upload expired or was already saved'}), 404
+    return jsonify({'success': True})
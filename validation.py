@@ -0,0 +1,179 @@
+from final_assignment import DAY_MAPPING
+from import_schema import TEMPLATES, MAX_REPORTED_ERRORS, UploadError, integer, clock
+
+# Inclusive bounds of whole-number columns
+RANGES = {
+    "forecasted": {"YEAR": (1, 6), "ENROLLED COUNT": (0, 100000)},
+    "programs": {"PRIORITY INDEX": (1, 100)},
+    "prospectus": {"YEAR": (1, 6), "UNITS": (0, 12), "SEMESTER": (1, 3)},
+    "rooms": {"CAPACITY": (1, 1000)},
+    "timeslots": {"KEY": (1, 10000), "DURATION": (1, 24 * 60)},
+    "days": {"KEY": (1, 10000)},
+}
+
+# Columns limited to a fixed set of values
+CHOICES = {
+    "rooms": {"SIZE": {"S", "M", "L"}},
+    "days": {"DAY ABBREVIATION": set(DAY_MAPPING), "DAY TYPE": {"Single", "Pair"}},
+}
+
+# Column combinations that must not repeat within a sheet
+UNIQUE_KEYS = {
+    "forecasted": [("PROGRAM", "YEAR")],
+    "programs": [("PROGRAM ABBREVIATION",)],
+    "prospectus": [("PROGRAM ABBREVIATION", "YEAR", "SEMESTER", "COURSE CODE")],
+    "rooms": [("ROOM CODE",)],
+    "timeslots": [("KEY",), ("START TIME", "END TIME")],
+    "days": [("KEY",), ("DAY ABBREVIATION",)],
+}
+
+# Column -> (referenced template, referenced column, values allowed without a match)
+FOREIGN_KEYS = {
+    "forecasted": {"PROGRAM": ("programs", "PROGRAM ABBREVIATION", ())},
+    "prospectus": {"PROGRAM ABBREVIATION": ("programs", "PROGRAM ABBREVIATION", ())},
+    "rooms": {"PROGRAM OWNER": ("programs", "PROGRAM ABBREVIATION", ("NONE",))},
+}
+
+def required_columns(template):
+    """Columns the save path can't do without: whole numbers and the natural key rows are matched by"""
+    names = [name for name, parse in TEMPLATES[template] if parse is integer]
+    return names + [name for name in UNIQUE_KEYS[template][0] if name not in names]
+
+
+def parsed_clock(value):
+    """clock() of a value, or None when it isn't a time of day"""
+    try:
+        return clock(value)
+    except ValueError:
+        return None
+
+
+def referenced(template):
+    """(template, column) pairs the foreign keys of a template point at"""
+    return {(ref_template, ref_column) for ref_template, ref_column, _ in FOREIGN_KEYS.get(template, {}).values()}
+
+
+
+def validate(template, records, references=None, row_numbers=None):
+    """Row-level problems of a parsed sheet, checked column by column.
+
+    references maps (template, column) to the set of values a foreign key
+    may take; keys whose reference is missing are not checked. row_numbers
+    are the sheet rows of the records (the header being row 1, with no
+    blank rows by default). Returns dicts with the row, column and message,
+    ordered by row.
+    """
+    import pandas as pd
+
+    references = references or {}
+    records = list(records)
+    columns = [name for name, _ in TEMPLATES[template]]
+    df = pd.DataFrame.from_records(records, columns=columns)
+    df = df.astype(object).where(df.notna(), None)
+    rows = pd.Series(row_numbers if row_numbers is not None else range(2, len(df) + 2), index=df.index)
+    problems = []
+
+    def flag(mask, column, message):
+        if mask.any():
+            problems.extend(
+                {"row": int(row), "column": column, "error": message(value) if callable(message) else message}
+                for row, value in zip(rows[mask], df.loc[mask, column])
+            )
+
+    present = {}
+    for name in columns:
+        present[name] = df[name].notna() & (df[name].astype(str).str.strip() != "")
+    for name in required_columns(template):
+        flag(~present[name], name, "is required")
+
+    # Types and ranges, one vectorized pass per column
+    numbers, minutes = {}, {}
+    for name, parse in TEMPLATES[template]:
+        if parse is integer:
+            number = pd.to_numeric(df[name], errors="coerce")
+            bad = present[name] & (number.isna() | (number % 1 != 0))
+            flag(bad, name, lambda value: f"expected a whole number, got {value!r}")
+            numbers[name] = number.where(~bad)
+            low, high = RANGES.get(template, {}).get(name, (None, None))
+            if low is not None:
+                flag(numbers[name].notna() & ((numbers[name] < low) | (numbers[name] > high)), name,
+                     lambda value: f"must be between {low} and {high}, got {value!r}")
+        elif parse is clock:
+            # The same parser the save path uses, so every format it takes passes here
+            parsed = df[name].where(present[name]).map(parsed_clock, na_action="ignore")
+            flag(present[name] & parsed.isna(), name, lambda value: f"expected a time of day, got {value!r}")
+            parsed = pd.to_datetime(parsed, format="%H:%M", errors="coerce")
+            minutes[name] = parsed.dt.hour * 60 + parsed.dt.minute
+
+    for name, allowed in CHOICES.get(template, {}).items():
+        flag(present[name] & ~df[name].isin(allowed), name,
+             lambda value: f"unknown value {value!r} (expected one of {', '.join(sorted(allowed))})")
+
+    if template == "timeslots":
+        start, end = minutes["START TIME"], minutes["END TIME"]
+        flag(start.notna() & end.notna() & (end <= start), "END TIME", "must be after START TIME")
+        flag(start.notna() & end.notna() & (end > start) & numbers["DURATION"].notna()
+             & (numbers["DURATION"] != end - start), "DURATION",
+             lambda value: f"{value} does not match START TIME to END TIME")
+
+    for key in UNIQUE_KEYS.get(template, []):
+        key = list(key)
+        complete = pd.concat([present[name] for name in key], axis=1).all(axis=1)
+        duplicate = complete & df.duplicated(subset=key, keep="first")
+        if duplicate.any():
+            first_rows = rows.groupby([df[name] for name in key], dropna=False).transform("min")
+            problems.extend(
+                {"row": int(row), "column": ", ".join(key), "error": f"duplicate of row {int(first)}"}
+                for row, first in zip(rows[duplicate], first_rows[duplicate])
+            )
+
+    problems.extend(reference_problems(template, records, references, list(rows)))
+    problems.sort(key=lambda problem: problem["row"])
+    return problems
+
+
+def reference_problems(template, records, references, row_numbers=None):
+    """Foreign key values of a sheet missing from references, in the form validate() reports"""
+    problems = []
+    rows = row_numbers if row_numbers is not None else range(2, len(records) + 2)
+    for name, (ref_template, ref_column, always_allowed) in FOREIGN_KEYS.get(template, {}).items():
+        values = references.get((ref_template, ref_column))
+        if values is None:
+            continue
+        allowed = set(values) | set(always_allowed)
+        problems.extend(
+            {"row": int(row), "column": name, "error": f"{record.get(name)!r} is not in {ref_template}"}
+            for row, record in zip(rows, records)
+            if record.get(name) is not None and str(record.get(name)).strip() != ""
+            and record.get(name) not in allowed
+        )
+    return problems
+
+
+def raise_problems(problems):
+    """Raise an UploadError listing the first of problems, if any"""
+    if problems:
+        shown = [f"Row {p['row']}, {p['column']}: {p['error']}" for p in problems[:MAX_REPORTED_ERRORS]]
+        if len(problems) > len(shown):
+            shown.append(f"... and {len(problems) - len(shown)} more")
+        raise UploadError(f"{len(problems)} problem(s) in the upload", details=shown)
+
+
+def check(template, records, references=None, row_numbers=None):
+    """Raise an UploadError listing the first problems found by validate()"""
+    raise_problems(validate(template, records, references, row_numbers))
+
+
+def check_references(template, records, references, row_numbers=None):
+    """check() of the foreign keys alone, for sheets whose other checks already passed"""
+    raise_problems(sorted(reference_problems(template, records, references, row_numbers),
+                          key=lambda problem: problem["row"]))
+
+
+def references_from(records_by_template):
+    """Foreign key targets taken from sheets uploaded together"""
+    targets = set().union(*(referenced(template) for template in FOREIGN_KEYS))
+    return {
+        (template, column): {record.get(column) for record in records_by_template[template]}
+        for template, column in targets if template in records_by_template
+    }